@@ -1,12 +1,15 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import products, categories, auth, orders
+from app.api.v1.endpoints import products, product_bulk, categories, auth, orders, analytics
 
 
 api_router = APIRouter(prefix="/api/v1")
+# Static /products/... routes first, ahead of /products/{product_id}
+api_router.include_router(product_bulk.router)
 api_router.include_router(products.router)
 api_router.include_router(categories.router)
 api_router.include_router(auth.router)
 api_router.include_router(orders.router)
+api_router.include_router(analytics.router)
 
 
@@ -0,0 +1,86 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_async_db
+from app.models import Category, Product, SalesDaily, ProductSalesDaily, CategorySalesDaily
+from app.schemas.analytics import SalesReport, SalesRow
+from app.deps.auth import require_admin
+
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+GROUPINGS = ("day", "product", "category")
+
+
+def _totals(table):
+	return (
+		func.sum(table.revenue).label("revenue"),
+		func.sum(table.units).label("units"),
+		func.sum(table.orders).label("orders"),
+	)
+
+
+@router.get("/sales", response_model=SalesReport, response_model_exclude_none=True, dependencies=[Depends(require_admin)])
+async def sales_report(
+	date_from: Optional[date] = Query(None, alias="from", description="First day included (YYYY-MM-DD)"),
+	date_to: Optional[date] = Query(None, alias="to", description="Last day included (YYYY-MM-DD)"),
+	group_by: str = Query("day", description="day, product or category"),
+	db: AsyncSession = Depends(get_async_db),
+):
+	"""
+	Revenue, units sold and order counts for a date range (admin only).
+
+	Served from the daily rollup tables that create_order keeps up to date, so
+	the cost depends on the number of days and products in the range, never on
+	the number of orders. group_by=day gives one row per day; product and
+	category give range totals per product/category, highest revenue first.
+	Overall totals always come from the per-day rollup.
+	"""
+	if group_by not in GROUPINGS:
+		raise HTTPException(status_code=400, detail=f"group_by must be one of: {', '.join(GROUPINGS)}")
+	if date_from and date_to and date_from > date_to:
+		raise HTTPException(status_code=400, detail="from must not be after to")
+
+	def in_range(query, table):
+		if date_from:
+			query = query.where(table.day >= date_from)
+		if date_to:
+			query = query.where(table.day <= date_to)
+		return query
+
+	totals = (await db.execute(in_range(select(*_totals(SalesDaily)), SalesDaily))).one()
+
+	if group_by == "day":
+		query = select(SalesDaily.day, SalesDaily.revenue, SalesDaily.units, SalesDaily.orders).order_by(SalesDaily.day)
+		query = in_range(query, SalesDaily)
+	elif group_by == "product":
+		query = (
+			select(ProductSalesDaily.product_id, Product.name, *_totals(ProductSalesDaily))
+			.outerjoin(Product, Product.id == ProductSalesDaily.product_id)
+			.group_by(ProductSalesDaily.product_id, Product.name)
+			.order_by(func.sum(ProductSalesDaily.revenue).desc(), ProductSalesDaily.product_id)
+		)
+		query = in_range(query, ProductSalesDaily)
+	else:
+		query = (
+			select(CategorySalesDaily.category_id, Category.name, *_totals(CategorySalesDaily))
+			.outerjoin(Category, Category.id == CategorySalesDaily.category_id)
+			.group_by(CategorySalesDaily.category_id, Category.name)
+			.order_by(func.sum(CategorySalesDaily.revenue).desc(), CategorySalesDaily.category_id)
+		)
+		query = in_range(query, CategorySalesDaily)
+
+	rows = (await db.execute(query)).mappings().all()
+	return SalesReport(
+		group_by=group_by,
+		date_from=date_from,
+		date_to=date_to,
+		revenue=totals.revenue or 0,
+		units=totals.units or 0,
+		orders=totals.orders or 0,
+		rows=[SalesRow(**row) for row in rows],
+	)
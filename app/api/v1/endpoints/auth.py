@@ -2,64 +2,95 @@ import secrets
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.models import User
 from app.schemas.user import UserCreate, UserLogin, UserOut, Token, ForgotPasswordRequest, ResetPasswordRequest
-from app.core.security import get_password_hash, verify_password, create_access_token
+from app.core.security import password_hasher, create_access_token
+from app.deps.auth import CurrentUser, forget_user_tokens, get_current_user, require_admin
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+# Password hashing runs on password_hasher's process pool, so these endpoints are
+# async: a login waiting for a hash holds no threadpool thread.
+
 
 @router.post("/signup", response_model=UserOut)
-def signup(user_in: UserCreate, db: Session = Depends(get_db)):
-	existing = db.query(User).filter(User.email == user_in.email).first()
+async def signup(user_in: UserCreate, db: AsyncSession = Depends(get_async_db)):
+	existing = (await db.scalars(select(User.id).filter(User.email == user_in.email))).first()
 	if existing:
 		raise HTTPException(status_code=400, detail="Email already registered")
 	user = User(
 		email=user_in.email,
 		full_name=user_in.full_name,
-		hashed_password=get_password_hash(user_in.password),
+		hashed_password=await password_hasher.hash(user_in.password),
 	)
 	db.add(user)
-	db.commit()
-	db.refresh(user)
+	await db.commit()
+	await db.refresh(user)
 	return user
 
 
 @router.post("/login", response_model=Token)
-def login(user_in: UserLogin, db: Session = Depends(get_db)):
-	user: Optional[User] = db.query(User).filter(User.email == user_in.email).first()
-	if not user or not verify_password(user_in.password, user.hashed_password):
+async def login(user_in: UserLogin, db: AsyncSession = Depends(get_async_db)):
+	user: Optional[User] = (await db.scalars(select(User).filter(User.email == user_in.email))).first()
+	if not user:
+		raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+	valid, new_hash = await password_hasher.verify_and_update(user_in.password, user.hashed_password)
+	if not valid:
 		raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
-	token = create_access_token(subject=str(user.id))
+	if not user.is_active:
+		raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account is deactivated")
+	if new_hash:
+		# Stored with fewer rounds than PASSWORD_HASH_ROUNDS: upgrade while we have the plain password
+		user.hashed_password = new_hash
+		await db.commit()
+	token = create_access_token(subject=str(user.id), token_version=user.token_version)
 	return {"access_token": token, "token_type": "bearer"}
 
 
 @router.post("/forgot-password")
-def forgot_password(req: ForgotPasswordRequest, db: Session = Depends(get_db)):
-	user: Optional[User] = db.query(User).filter(User.email == req.email).first()
+async def forgot_password(req: ForgotPasswordRequest, db: AsyncSession = Depends(get_async_db)):
+	user: Optional[User] = (await db.scalars(select(User).filter(User.email == req.email))).first()
 	if not user:
 		# Do not reveal if email exists
 		return {"message": "If the account exists, a reset link has been sent"}
 	user.reset_token = secrets.token_urlsafe(32)
-	db.add(user)
-	db.commit()
+	await db.commit()
 	# In production, send email with the token link
 	return {"reset_token": user.reset_token}
 
 
 @router.post("/reset-password")
-def reset_password(req: ResetPasswordRequest, db: Session = Depends(get_db)):
-	user: Optional[User] = db.query(User).filter(User.reset_token == req.token).first()
+async def reset_password(req: ResetPasswordRequest, db: AsyncSession = Depends(get_async_db)):
+	user: Optional[User] = (await db.scalars(select(User).filter(User.reset_token == req.token))).first()
 	if not user:
 		raise HTTPException(status_code=400, detail="Invalid token")
-	user.hashed_password = get_password_hash(req.new_password)
+	user.hashed_password = await password_hasher.hash(req.new_password)
 	user.reset_token = None
-	db.add(user)
-	db.commit()
+	# Sign out everywhere: tokens issued with the old password stop working
+	user.token_version = User.token_version + 1
+	await db.commit()
+	forget_user_tokens(user.id)
 	return {"message": "Password reset successful"}
 
 
+@router.get("/me", response_model=UserOut)
+async def read_current_user(current: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+	user = await db.get(User, current.id)
+	return user
+
+
+@router.post("/users/{user_id}/deactivate", response_model=UserOut, dependencies=[Depends(require_admin)])
+async def deactivate_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+	"""Disable an account (admin only); its existing tokens are rejected from the next request."""
+	user = await db.get(User, user_id)
+	if not user:
+		raise HTTPException(status_code=404, detail="User not found")
+	user.is_active = False
+	await db.commit()
+	forget_user_tokens(user.id)
+	return user
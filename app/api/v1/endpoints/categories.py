@@ -1,63 +1,74 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from pydantic_core import to_json
 
-from app.db.session import get_db
-from app.models import Category, Product
+from app.db.session import get_async_db
+from app.models import Category
 from app.deps.auth import require_admin
+from app.core.slugs import category_slugs
+from app.core.cache import details_cache
+from app.core.responses import RawJSONResponse
 
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
 
 @router.get("/", response_model=List[str])
-def list_categories(db: Session = Depends(get_db)):
+async def list_categories(db: AsyncSession = Depends(get_async_db)):
     """Get all category names."""
-    categories = db.query(Category).all()
-    return [c.name for c in categories]
+    names = await db.scalars(select(Category.name).order_by(Category.id))
+    return RawJSONResponse(to_json(names.all()))
 
 
 @router.get("/with-counts")
-def list_categories_with_counts(db: Session = Depends(get_db)):
+async def list_categories_with_counts(db: AsyncSession = Depends(get_async_db)):
     """
     Get all categories with product counts.
     
+    The counts are counter columns on categories, kept current by database
+    triggers on every product insert, delete, category move and status change,
+    so this is a plain read of the categories table.
+    (python maintenance.py reconcile-category-counts re-derives them.)
+    
     Returns:
     [
         {
             "id": 1,
             "name": "Rings",
-            "product_count": 3
+            "product_count": 3,
+            "available_count": 2
         }
     ]
     """
-    categories = db.query(
-        Category.id,
-        Category.name,
-        func.count(Product.id).label("product_count")
-    ).outerjoin(Product).group_by(Category.id, Category.name).all()
+    categories = (await db.execute(
+        select(Category.id, Category.name, Category.product_count, Category.available_count).order_by(Category.id)
+    )).mappings().all()
     
-    return [
-        {
-            "id": cat.id,
-            "name": cat.name,
-            "product_count": cat.product_count
-        }
-        for cat in categories
-    ]
+    # Serialized straight from the row mappings
+    return RawJSONResponse(to_json([dict(cat) for cat in categories]))
 
 
 @router.post("/", dependencies=[Depends(require_admin)], response_model=str)
-def create_category(name: str, db: Session = Depends(get_db)):
+async def create_category(name: str, db: AsyncSession = Depends(get_async_db)):
     """Create a new category (admin only)."""
-    if db.query(Category).filter(Category.name == name).first():
+    if (await db.scalars(select(Category.id).filter(Category.name == name))).first():
         raise HTTPException(status_code=400, detail="Category already exists")
     
+    # The slug defaults to a free one ('Rings!' next to 'Rings' gets 'rings-2')
     category = Category(name=name)
     db.add(category)
-    db.commit()
-    db.refresh(category)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Another request took the name or slug since the checks above
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Category already exists")
+    await category_slugs.refresh(db)
+    # Details payloads embed the category name
+    details_cache.clear()
     return category.name
 
 
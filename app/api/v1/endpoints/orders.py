@@ -1,19 +1,100 @@
-from typing import List
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from sqlalchemy import Integer, String, case, func, literal, select, tuple_, type_coerce, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from pydantic import TypeAdapter
+from pydantic_core import to_json
 
-from app.db.session import get_db
-from app.models import Order, OrderItem
-from app.schemas.order import OrderCreate, OrderOut
+from app.db.session import get_async_db, begin_immediate
+from app.models import Order, OrderItem, Product
+from app.schemas.order import OrderCreate, OrderOut, OrderPage, OrderItemError
 from app.deps.auth import require_admin
+from app.core.responses import RawJSONResponse
+from app.core.cursor import decode_cursor, encode_cursor
+from app.core.export import export_response, stream_rows
+from app.core.cache import catalog_cache, details_cache
+from app.core.analytics import record_order_sales
+from app.core.idempotency import (
+	claim_idempotency_key,
+	release_idempotency_key,
+	replay_response,
+	request_fingerprint,
+	store_response,
+)
 
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
+_ORDER_LIST = TypeAdapter(List[OrderOut])
+_ORDER_PAGE = TypeAdapter(OrderPage)
+
+
+async def _reserve_stock(db: AsyncSession, quantities: Dict[int, int]) -> Dict[int, Product]:
+	"""
+	Load the ordered products in one query and take their stock.
+
+	Each product gets a single conditional ``UPDATE ... WHERE stock >= qty``, so
+	a concurrent checkout can never drive stock below zero. Any item that cannot
+	be fulfilled raises a 409 listing every failing item; the caller's
+	transaction is then rolled back with nothing reserved.
+	"""
+	products = {
+		product.id: product
+		for product in await db.scalars(select(Product).where(Product.id.in_(quantities)))
+	}
+	errors = []
+	for product_id, quantity in quantities.items():
+		product = products.get(product_id)
+		if product is None:
+			errors.append(OrderItemError(product_id=product_id, requested=quantity, available=0, error="not_found"))
+		elif (product.stock or 0) < quantity:
+			errors.append(OrderItemError(product_id=product_id, requested=quantity, available=product.stock or 0, error="insufficient_stock"))
+	if not errors:
+		now = datetime.now(timezone.utc)
+		# Ascending id order keeps lock acquisition consistent on databases with row locks
+		for product_id in sorted(quantities):
+			quantity = quantities[product_id]
+			result = await db.execute(
+				update(Product)
+				.where(Product.id == product_id, Product.stock >= quantity)
+				.values(
+					stock=Product.stock - quantity,
+					sold=func.coalesce(Product.sold, 0) + quantity,
+					status=case((Product.stock == quantity, "out_of_stock"), else_=Product.status),
+					updated_at=now,
+				)
+				.execution_options(synchronize_session=False)
+			)
+			if result.rowcount != 1:
+				# Taken by a concurrent checkout since the read above
+				available = await db.scalar(select(Product.stock).where(Product.id == product_id))
+				errors.append(OrderItemError(product_id=product_id, requested=quantity, available=available or 0, error="insufficient_stock"))
+	if errors:
+		raise HTTPException(
+			status_code=409,
+			detail={"message": "Some items cannot be fulfilled", "items": [error.model_dump() for error in errors]},
+		)
+	return products
+
+
+async def _place_order(db: AsyncSession, order_in: OrderCreate) -> Tuple[Order, Dict[int, Product]]:
+	"""
+	Reserve stock and add the priced order to the session, flushed but not committed.
+
+	The price lookup, stock updates, order insert and sales rollups share one
+	transaction, so either the whole order is placed or nothing changes.
+	Client-sent unit prices are ignored.
+	"""
+	quantities: Dict[int, int] = {}
+	for it in order_in.items:
+		quantities[it.product_id] = quantities.get(it.product_id, 0) + it.quantity
+
+	await begin_immediate(db)
+	products = await _reserve_stock(db, quantities)
 
-@router.post("/", response_model=OrderOut)
-def create_order(order_in: OrderCreate, db: Session = Depends(get_db)):
 	order = Order(
 		customer_name=order_in.customer_name,
 		email=order_in.email,
@@ -26,33 +107,187 @@ def create_order(order_in: OrderCreate, db: Session = Depends(get_db)):
 	)
 	total = 0.0
 	for it in order_in.items:
-		line_total = it.unit_price * it.quantity
+		product = products[it.product_id]
+		unit_price = product.offer_price or product.retail_price
+		line_total = unit_price * it.quantity
 		total += line_total
 		order.items.append(
 			OrderItem(
 				product_id=it.product_id,
-				name=it.name,
+				name=product.name,
 				image_url=it.image_url,
-				unit_price=it.unit_price,
+				unit_price=unit_price,
 				quantity=it.quantity,
 				line_total=line_total,
 			)
 		)
 	order.total_amount = total
 	db.add(order)
-	db.commit()
-	db.refresh(order)
-	return order
+	await db.flush()
+	await record_order_sales(db, order.id)
+	return order, products
+
+
+def _forget_products(products: Dict[int, Product]) -> None:
+	"""Drop cached views of products whose stock, sold count or status a committed checkout changed."""
+	catalog_cache.clear()
+	for product in products.values():
+		details_cache.pop(("id", product.id))
+		details_cache.pop(("key", product.unique_key))
+
+
+@router.post("/", response_model=OrderOut)
+async def create_order(
+	order_in: OrderCreate,
+	db: AsyncSession = Depends(get_async_db),
+	idempotency_key: Optional[str] = Header(None, description="Client-generated key; retries with the same key replay the first response"),
+):
+	"""
+	Place an order, pricing every line from the catalog and reserving its stock.
 
+	With an Idempotency-Key header the outcome (the order, or a 409 rejection)
+	is stored in the same transaction as the order. A retry with the same key
+	gets the stored response back, marked Idempotent-Replayed, without placing
+	the order again; a duplicate sent while the first is still running waits
+	for it instead of racing it.
+	"""
+	if idempotency_key is None:
+		try:
+			order, products = await _place_order(db, order_in)
+		except HTTPException:
+			await db.rollback()
+			raise
+		# Sessions don't expire on commit, so the order and its items are returned as flushed
+		await db.commit()
+		_forget_products(products)
+		return order
 
-@router.get("/", response_model=List[OrderOut], dependencies=[Depends(require_admin)])
-def list_orders(db: Session = Depends(get_db)):
-	return db.query(Order).all()
+	stored = await claim_idempotency_key(db, idempotency_key, request_fingerprint(order_in.model_dump(mode="json")))
+	if stored is not None:
+		return replay_response(stored)
+	try:
+		order, products = await _place_order(db, order_in)
+		body = OrderOut.model_validate(order).model_dump_json().encode()
+		await store_response(db, idempotency_key, 200, body)
+		await db.commit()
+	except HTTPException as exc:
+		# A rejected checkout is an outcome too: retries get the same answer
+		await db.rollback()
+		await store_response(db, idempotency_key, exc.status_code, to_json({"detail": exc.detail}))
+		await db.commit()
+		raise
+	except BaseException:
+		await db.rollback()
+		await release_idempotency_key(db, idempotency_key)
+		raise
+	_forget_products(products)
+	return RawJSONResponse(body)
+
+
+def _created_at_key(value: datetime) -> str:
+	"""Render a filter bound the way created_at is stored (naive UTC text) so it compares as text."""
+	if value.tzinfo is not None:
+		value = value.astimezone(timezone.utc).replace(tzinfo=None)
+	return value.isoformat(sep=" ", timespec="microseconds" if value.microsecond else "seconds")
+
+
+@router.get("/", response_model=OrderPage, dependencies=[Depends(require_admin)])
+async def list_orders(
+	db: AsyncSession = Depends(get_async_db),
+	status: Optional[str] = Query(None, description="Filter by order status, e.g. pending"),
+	email: Optional[str] = Query(None, description="Customer email (case-insensitive exact match)"),
+	city: Optional[str] = Query(None, description="Delivery city (case-insensitive exact match)"),
+	created_from: Optional[datetime] = Query(None, description="Orders placed at or after this time (UTC unless an offset is given)"),
+	created_to: Optional[datetime] = Query(None, description="Orders placed before this time"),
+	limit: int = Query(100, ge=1, le=500, description="Orders per page"),
+	cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+):
+	"""
+	List orders newest first, one keyset page at a time (admin only).
+
+	Returns {"items": [...], "next_cursor": "..."}; pass next_cursor back to
+	get the following page. Each filter has a matching index, so a page costs
+	an index seek however deep it is, and items are fetched for the whole page
+	with one extra IN query: two queries per page in total.
+	"""
+	created_key = type_coerce(Order.created_at, String)
+	query = (
+		select(Order, created_key.label("created_at_key"))
+		.options(selectinload(Order.items))
+		.order_by(Order.created_at.desc(), Order.id.desc())
+	)
+	if status:
+		query = query.where(Order.status == status)
+	if email:
+		query = query.where(func.lower(Order.email) == email.strip().lower())
+	if city:
+		query = query.where(func.lower(Order.city) == city.strip().lower())
+	if created_from:
+		query = query.where(created_key >= _created_at_key(created_from))
+	if created_to:
+		query = query.where(created_key < _created_at_key(created_to))
+	if cursor:
+		created_at, order_id = decode_cursor(cursor)
+		query = query.where(
+			tuple_(created_key, Order.id) < tuple_(literal(created_at, String), literal(order_id, Integer))
+		)
+
+	rows = (await db.execute(query.limit(limit + 1))).all()
+	next_cursor = None
+	if len(rows) > limit:
+		rows = rows[:limit]
+		last, last_created_at = rows[-1]
+		next_cursor = encode_cursor(last_created_at, last.id)
+	page = OrderPage(items=_ORDER_LIST.validate_python([order for order, _ in rows], from_attributes=True), next_cursor=next_cursor)
+	return RawJSONResponse(_ORDER_PAGE.dump_json(page))
+
+
+_ORDER_COLUMNS = [column.name for column in Order.__table__.columns]
+_ITEM_COLUMNS = [column.name for column in OrderItem.__table__.columns if column.name != "order_id"]
+
+
+async def _order_records(rows: AsyncIterator[dict]) -> AsyncIterator[dict]:
+	"""Fold consecutive (order, item) join rows back into one record per order."""
+	record = None
+	async for row in rows:
+		if record is None or record["id"] != row["id"]:
+			if record is not None:
+				yield record
+			record = {name: row[name] for name in _ORDER_COLUMNS}
+			record["items"] = []
+		if row["item_id"] is not None:
+			record["items"].append({name: row[f"item_{name}"] for name in _ITEM_COLUMNS})
+	if record is not None:
+		yield record
+
+
+@router.get("/export", dependencies=[Depends(require_admin)])
+async def export_orders(
+	fmt: str = Query("ndjson", alias="format", description="ndjson or csv"),
+	gzip: bool = Query(False, description="Compress the download with gzip"),
+):
+	"""
+	Stream every order with its items as NDJSON or CSV (admin only).
+
+	Orders and items are read together through one server-side cursor, so
+	memory stays flat regardless of how many orders there are. NDJSON has one
+	order per line with nested items; CSV has one line per item, repeating the
+	order columns (orders without items get a single line with empty item columns).
+	"""
+	statement = (
+		select(*Order.__table__.columns, *(OrderItem.__table__.c[name].label(f"item_{name}") for name in _ITEM_COLUMNS))
+		.outerjoin(OrderItem, OrderItem.order_id == Order.id)
+		.order_by(Order.id, OrderItem.id)
+	)
+	if fmt == "csv":
+		columns = _ORDER_COLUMNS + [f"item_{name}" for name in _ITEM_COLUMNS]
+		return export_response(stream_rows(statement), fmt, "orders", columns, gzip)
+	return export_response(_order_records(stream_rows(statement)), fmt, "orders", gzip=gzip)
 
 
 @router.get("/{order_id}", response_model=OrderOut, dependencies=[Depends(require_admin)])
-def get_order(order_id: int, db: Session = Depends(get_db)):
-	order = db.query(Order).filter(Order.id == order_id).first()
+async def get_order(order_id: int, db: AsyncSession = Depends(get_async_db)):
+	order = await db.get(Order, order_id, options=[selectinload(Order.items)])
 	if not order:
 		raise HTTPException(status_code=404, detail="Order not found")
 	return order
@@ -0,0 +1,327 @@
+import codecs
+import csv
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import ValidationError
+from sqlalchemy import case, func, insert, or_, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_async_db, is_sqlite
+from app.models import Product as ProductModel, Category
+from app.schemas.product import (
+    ProductCreate,
+    ProductImportReport,
+    ImportRowError,
+    ProductBulkPatch,
+    ProductBulkPatchResult,
+    COUNT_FIELDS,
+)
+from app.deps.auth import require_admin
+from app.core.cache import catalog_cache, details_cache
+from app.core.export import export_response, stream_rows
+from app.core.image_jobs import image_job_counts, requeue_image_jobs
+
+
+router = APIRouter(prefix="/products", tags=["products"])
+
+IMPORT_FORMATS = {"text/csv": "csv", "application/x-ndjson": "ndjson", "application/jsonl": "ndjson"}
+MAX_REPORTED_ERRORS = 1000
+# Stay well below SQLite's bound-parameter limit in IN (...) lists
+IN_CHUNK = 500
+
+_PRODUCT_FIELDS = list(ProductCreate.model_fields)
+
+
+async def _iter_lines(request: Request) -> AsyncIterator[str]:
+    """Split the request body into lines as it arrives, without buffering the whole upload."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in request.stream():
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+async def _iter_records(request: Request, fmt: str) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (row number, record, parse error) for every data row of a CSV or NDJSON upload."""
+    row = 0
+    if fmt == "ndjson":
+        async for line in _iter_lines(request):
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                yield row, None, f"invalid JSON: {exc}"
+                continue
+            if not isinstance(record, dict):
+                yield row, None, "expected a JSON object"
+                continue
+            yield row, record, None
+        return
+
+    header = None
+    pending = ""
+    async for line in _iter_lines(request):
+        # A quoted field may contain newlines: keep joining until the quotes balance
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            continue
+        fields = next(csv.reader([pending.rstrip("\r")]), [])
+        pending = ""
+        if not any(field.strip() for field in fields):
+            continue
+        if header is None:
+            header = [name.strip() for name in fields]
+            continue
+        row += 1
+        # Empty CSV cells mean "not provided", so model defaults apply
+        yield row, {name: value for name, value in zip(header, fields) if value != ""}, None
+    if pending:
+        yield row + 1, None, "unterminated quoted field"
+
+
+def _import_values(record: dict) -> dict:
+    """Validate one record against ProductCreate and return the column values to write."""
+    if isinstance(record.get("images"), list):
+        record["images"] = json.dumps(record["images"])
+    values = ProductCreate.model_validate(record).model_dump()
+    values["unique_key"] = str(record.get("unique_key") or uuid.uuid4())
+    values["updated_at"] = datetime.now(timezone.utc)
+    return values
+
+
+class _Report:
+    def __init__(self):
+        self.result = ProductImportReport()
+
+    def fail(self, row: int, errors: List[str]) -> None:
+        self.result.failed += 1
+        if len(self.result.errors) < MAX_REPORTED_ERRORS:
+            self.result.errors.append(ImportRowError(row=row, errors=errors))
+        else:
+            self.result.errors_truncated = True
+
+
+def _chunks(items: list, size: int = IN_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+async def _write_batch(db: AsyncSession, batch: List[Tuple[int, dict]], upsert: bool, category_ids: Set[int], report: _Report) -> None:
+    """Insert (or upsert by unique_key) one batch with a single executemany, in its own transaction."""
+    keys = [values["unique_key"] for _, values in batch]
+    existing: Set[str] = set()
+    for chunk in _chunks(keys):
+        existing.update(await db.scalars(select(ProductModel.unique_key).where(ProductModel.unique_key.in_(chunk))))
+
+    rows: List[dict] = []
+    seen: Set[str] = set()
+    for row, values in batch:
+        key = values["unique_key"]
+        if values["category_id"] not in category_ids:
+            report.fail(row, [f"category_id: category {values['category_id']} does not exist"])
+        elif key in seen or (key in existing and not upsert):
+            report.fail(row, [f"unique_key: {key} already exists"])
+        else:
+            seen.add(key)
+            rows.append(values)
+    if not rows:
+        return
+
+    if upsert:
+        stmt = sqlite_insert(ProductModel)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ProductModel.unique_key],
+            set_={name: stmt.excluded[name] for name in _PRODUCT_FIELDS + ["updated_at"]},
+        )
+    else:
+        stmt = insert(ProductModel)
+    await db.execute(stmt, rows)
+    await db.commit()
+
+    updated = len(seen & existing)
+    report.result.updated += updated
+    report.result.inserted += len(rows) - updated
+
+
+@router.post("/import", response_model=ProductImportReport, dependencies=[Depends(require_admin)])
+async def import_products(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    fmt: Optional[str] = Query(None, alias="format", description="csv or ndjson; defaults to the Content-Type"),
+    mode: str = Query("insert", description="insert: skip rows whose unique_key exists; upsert: update them"),
+    batch_size: int = Query(1000, ge=1, le=10000, description="Rows per transaction")
+):
+    """
+    Bulk import products from a CSV or NDJSON upload (admin only).
+    
+    The body is streamed and parsed row by row. Each row is validated like
+    POST /products/ and written in batches, one executemany and one commit per
+    batch. Rows that fail validation are reported and skipped; the rest are kept.
+    
+    CSV needs a header row with ProductCreate field names (plus an optional
+    unique_key column). Empty cells fall back to the field default.
+    
+    Examples:
+    - curl -X POST "/products/import" -H "Content-Type: text/csv" --data-binary @catalog.csv
+    - curl -X POST "/products/import?mode=upsert" -H "Content-Type: application/x-ndjson" --data-binary @catalog.ndjson
+    """
+    fmt = fmt or IMPORT_FORMATS.get(request.headers.get("content-type", "").split(";")[0].strip())
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson, or pass ?format=")
+    if mode not in ("insert", "upsert"):
+        raise HTTPException(status_code=400, detail="mode must be insert or upsert")
+    upsert = mode == "upsert"
+    if upsert and not is_sqlite:
+        raise HTTPException(status_code=501, detail="Upsert mode requires SQLite")
+
+    category_ids = set(await db.scalars(select(Category.id)))
+    report = _Report()
+    batch: List[Tuple[int, dict]] = []
+    try:
+        async for row, record, error in _iter_records(request, fmt):
+            if error:
+                report.fail(row, [error])
+                continue
+            try:
+                batch.append((row, _import_values(record)))
+            except ValidationError as exc:
+                report.fail(row, [f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors()])
+                continue
+            if len(batch) >= batch_size:
+                await _write_batch(db, batch, upsert, category_ids, report)
+                batch = []
+        if batch:
+            await _write_batch(db, batch, upsert, category_ids, report)
+    finally:
+        if report.result.inserted or report.result.updated:
+            catalog_cache.clear()
+            details_cache.clear()
+    return report.result
+
+
+def _patch_expression(field: str, op: str, value):
+    """SQL expression for one patch group; relative changes never go below zero."""
+    column = getattr(ProductModel, field)
+    if field in COUNT_FIELDS and not isinstance(value, str):
+        value = int(value)
+    if op == "set":
+        return value
+    if op == "add":
+        expr = column + value
+    else:
+        expr = func.round(column * (1 + value / 100.0), 2)
+    return case((expr < 0, 0), else_=expr)
+
+
+@router.patch("/bulk", response_model=ProductBulkPatchResult, dependencies=[Depends(require_admin)])
+async def bulk_update_products(body: ProductBulkPatch, db: AsyncSession = Depends(get_async_db)):
+    """
+    Apply many price/stock/status changes in one transaction (admin only).
+    
+    Patches sharing the same field, op and value become a single
+    UPDATE ... WHERE id IN (...) OR unique_key IN (...) statement, so thousands of
+    patches cost a handful of statements. Groups run in the order their first
+    patch appears. Unknown ids/keys are listed in not_found.
+    
+    Example body:
+    {"patches": [
+        {"id": 1, "field": "offer_price", "op": "percent", "value": -10},
+        {"unique_key": "1295cb6d-...", "field": "stock", "op": "add", "value": 5},
+        {"id": 2, "field": "status", "value": "sold"}
+    ]}
+    """
+    groups: Dict[tuple, Tuple[List[int], List[str]]] = {}
+    for patch in body.patches:
+        ids, keys = groups.setdefault((patch.field, patch.op, patch.value), ([], []))
+        if patch.id is not None:
+            ids.append(patch.id)
+        else:
+            keys.append(patch.unique_key)
+
+    all_ids = sorted({i for ids, _ in groups.values() for i in ids})
+    all_keys = sorted({k for _, keys in groups.values() for k in keys})
+    found_ids: Set[int] = set()
+    found_keys: Set[str] = set()
+    for chunk in _chunks(all_ids):
+        found_ids.update(await db.scalars(select(ProductModel.id).where(ProductModel.id.in_(chunk))))
+    for chunk in _chunks(all_keys):
+        found_keys.update(await db.scalars(select(ProductModel.unique_key).where(ProductModel.unique_key.in_(chunk))))
+
+    statements = rows_updated = 0
+    now = datetime.now(timezone.utc)
+    for (field, op, value), (ids, keys) in groups.items():
+        ids = sorted(found_ids.intersection(ids))
+        keys = sorted(found_keys.intersection(keys))
+        values = {field: _patch_expression(field, op, value), "updated_at": now}
+        while ids or keys:
+            id_chunk, ids = ids[:IN_CHUNK], ids[IN_CHUNK:]
+            key_chunk, keys = keys[:IN_CHUNK - len(id_chunk)], keys[IN_CHUNK - len(id_chunk):]
+            conditions = []
+            if id_chunk:
+                conditions.append(ProductModel.id.in_(id_chunk))
+            if key_chunk:
+                conditions.append(ProductModel.unique_key.in_(key_chunk))
+            result = await db.execute(
+                update(ProductModel).where(or_(*conditions)).values(values),
+                execution_options={"synchronize_session": False},
+            )
+            statements += 1
+            rows_updated += result.rowcount
+    await db.commit()
+
+    if rows_updated:
+        catalog_cache.clear()
+        details_cache.clear()
+    not_found = [i for i in all_ids if i not in found_ids] + [k for k in all_keys if k not in found_keys]
+    return ProductBulkPatchResult(
+        patches=len(body.patches),
+        statements=statements,
+        rows_updated=rows_updated,
+        not_found=not_found,
+    )
+
+
+_EXPORT_COLUMNS = [column.name for column in ProductModel.__table__.columns]
+
+
+@router.get("/export", dependencies=[Depends(require_admin)])
+async def export_products(
+    fmt: str = Query("ndjson", alias="format", description="ndjson or csv"),
+    gzip: bool = Query(False, description="Compress the download with gzip"),
+):
+    """
+    Stream every product as NDJSON or CSV (admin only).
+    
+    Rows come off a server-side cursor in id order and are written as they
+    are read, so memory use does not grow with the catalog. The columns match
+    what POST /products/import accepts, so an export can be re-imported.
+    """
+    statement = select(ProductModel.__table__).order_by(ProductModel.id)
+    return export_response(stream_rows(statement), fmt, "products", _EXPORT_COLUMNS, gzip)
+
+
+@router.get("/images/jobs", dependencies=[Depends(require_admin)])
+async def image_job_stats(db: AsyncSession = Depends(get_async_db)):
+    """Number of image variant jobs in each state (admin only)."""
+    return await image_job_counts(db)
+
+
+@router.post("/images/requeue", dependencies=[Depends(require_admin)])
+async def requeue_images(
+    status: str = Query("failed", pattern="^(failed|all)$", description="failed, or all to re-render every image"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Send failed image jobs (or every image) back to the variant worker (admin only)."""
+    return {"requeued": await requeue_image_jobs(db, failed_only=status == "failed")}
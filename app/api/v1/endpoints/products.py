@@ -1,25 +1,93 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import Integer, String, column, func, literal, literal_column, select, table, text, tuple_, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager, selectinload
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from typing import List, Optional, Union
 import json
+import re
 
-from app.db.session import get_db
-from app.models import Product as ProductModel, Category
-from app.schemas.product import Product, ProductCreate, ProductUpdate
+from app.db.session import get_async_db, is_sqlite
+from app.models import Product as ProductModel, Category, ProductImage
+from app.schemas.product import Product, ProductCreate, ProductUpdate, ProductPage, ProductSearchHit
 from app.deps.auth import require_admin
+from app.core.cache import catalog_cache, details_cache
+from app.core.slugs import category_slugs
+from app.core.responses import RawJSONResponse
+from app.core.cursor import decode_cursor, encode_cursor
+from app.core.etag import catalog_etag, conditional, get_catalog_version, not_modified, product_etag, validator_headers
 
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+# Precompiled serializers: list endpoints encode straight to JSON bytes, and the
+# catalog cache keeps those bytes, so a cache hit does no serialization at all.
+_PRODUCT_LIST = TypeAdapter(List[Product])
+_PRODUCT_PAGE = TypeAdapter(ProductPage)
+_SEARCH_HITS = TypeAdapter(List[ProductSearchHit])
 
-@router.get("/", response_model=List[Product])
-def read_products(
-    db: Session = Depends(get_db),
+
+async def _cached(db: AsyncSession, key, load):
+    """
+    Return the (etag, value) catalog cache entry for ``key``, filling it with ``await load()`` on a miss.
+    
+    The catalog version is read before the data: a write landing in between then
+    only labels fresh data with an old ETag (a spurious 200 later), never the reverse.
+    """
+    entry = catalog_cache.get(key)
+    if entry is None:
+        etag = catalog_etag(await get_catalog_version(db))
+        entry = (etag, await load())
+        catalog_cache.set(key, entry)
+    return entry
+
+
+async def _cached_products(db: AsyncSession, key, query):
+    """Run a product listing query through the catalog cache, keyed on its normalized filters."""
+    async def load():
+        products = await db.scalars(query)
+        return _PRODUCT_LIST.dump_json(_PRODUCT_LIST.validate_python(products.all(), from_attributes=True))
+
+    return await _cached(db, key, load)
+
+
+async def _keyset_page(db: AsyncSession, query, cursor: str, limit: int) -> bytes:
+    """
+    Fetch one page ordered on (created_at, id), starting after ``cursor``.
+
+    The cursor carries created_at exactly as the database stores it, so the
+    row-value comparison below can seek on ix_products_created_at_id instead of
+    skipping rows like OFFSET does.
+    """
+    created_key = type_coerce(ProductModel.created_at, String)
+    query = query.add_columns(created_key.label("created_at_key")).order_by(ProductModel.created_at, ProductModel.id)
+    if cursor:
+        created_at, product_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(created_key, ProductModel.id) > tuple_(literal(created_at, String), literal(product_id, Integer))
+        )
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last, last_created_at = rows[-1]
+        next_cursor = encode_cursor(last_created_at, last.id)
+    page = ProductPage(items=_PRODUCT_LIST.validate_python([p for p, _ in rows], from_attributes=True), next_cursor=next_cursor)
+    return _PRODUCT_PAGE.dump_json(page)
+
+
+@router.get("/", response_model=Union[ProductPage, List[Product]])
+async def read_products(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     category_name: Optional[str] = Query(None, description="Filter by category name (e.g., 'Rings')"),
     category_id: Optional[int] = Query(None, description="Filter by category ID"),
     status: Optional[str] = Query(None, description="Filter by status: available, out_of_stock, sold"),
     limit: Optional[int] = Query(100, description="Limit number of products returned"),
-    offset: Optional[int] = Query(0, description="Offset for pagination")
+    offset: Optional[int] = Query(0, description="Offset for pagination"),
+    cursor: Optional[str] = Query(None, description="Keyset pagination cursor; pass an empty value for the first page")
 ):
     """
     Get all products with optional filtering by category, status, and pagination.
@@ -32,8 +100,16 @@ def read_products(
     - GET /products/?category_id=1 - Get products from category ID 1
     - GET /products/?status=available - Get only available products
     - GET /products/?limit=10&offset=20 - Paginated results
+    - GET /products/?cursor=&limit=10 - First page in cursor mode; returns
+      {"items": [...], "next_cursor": "..."}. Pass next_cursor back to get the
+      following page. Deep pages cost the same as the first one.
+    
+    Responses carry an ETag derived from the catalog version; send it back in
+    If-None-Match to get 304 Not Modified while the catalog is unchanged.
     """
-    query = db.query(ProductModel)
+    query = select(ProductModel)
+    # Normalized once: the filter and the cache key must agree, or " Rings" would cache a page served for "Rings"
+    category_name = category_name.strip().lower() if category_name and category_name.strip() else None
     
     # Filter by category name
     if category_name:
@@ -47,33 +123,84 @@ def read_products(
     if status:
         query = query.filter(ProductModel.status == status)
     
+    filters = (category_name, category_id, status)
+    
+    # Cursor (keyset) pagination
+    if cursor is not None:
+        etag, page = await _cached(db, ("page",) + filters + (limit, cursor), lambda: _keyset_page(db, query, cursor, limit))
+        return conditional(request, response, etag, page)
+    
     # Apply pagination
-    query = query.limit(limit).offset(offset)
+    query = query.order_by(ProductModel.created_at, ProductModel.id).limit(limit).offset(offset)
     
-    return query.all()
+    etag, products = await _cached_products(db, ("list",) + filters + (limit, offset), query)
+    return conditional(request, response, etag, products)
 
 
 @router.get("/details/by-key/{unique_key}")
-def get_product_details_by_key_for_order(unique_key: str, db: Session = Depends(get_db)):
+async def get_product_details_by_key_for_order(
+    unique_key: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     Get detailed product information for order placement and WhatsApp contact by unique key.
     """
-    product = db.query(ProductModel).join(Category).filter(ProductModel.unique_key == unique_key).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
+    return await _product_details(db, request, ("key", unique_key), ProductModel.unique_key == unique_key)
+
+
+def _forget_product_details(product) -> None:
+    details_cache.pop(("id", product.id))
+    details_cache.pop(("key", product.unique_key))
+
+
+async def _product_details(db: AsyncSession, request: Request, cache_key, condition) -> Response:
+    """
+    Serve the details payload from its pre-rendered bytes.
     
-    return _format_product_details(product)
+    A cache hit is a single dict lookup: no query, no formatting, no JSON encoding.
+    On a miss the product is loaded once and the rendered payload is stored under
+    both its id and its unique key.
+    """
+    entry = details_cache.get(cache_key)
+    if entry is None:
+        query = (
+            select(ProductModel)
+            .join(Category)
+            .options(
+                contains_eager(ProductModel.category),
+                selectinload(ProductModel.media).selectinload(ProductImage.job),
+            )
+            .filter(condition)
+        )
+        product = (await db.scalars(query)).first()
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        entry = (
+            product_etag(product.id, product.updated_at, product.created_at),
+            to_json(_format_product_details(product)),
+        )
+        details_cache.set(("id", product.id), entry)
+        details_cache.set(("key", product.unique_key), entry)
+    
+    etag, body = entry
+    return not_modified(request, etag) or RawJSONResponse(body, headers=validator_headers(etag))
 
 
 def _format_product_details(product):
     """Helper function to format product details for order placement and WhatsApp contact."""
-    # Parse images JSON string to list
-    images = []
-    if product.images:
-        try:
-            images = json.loads(product.images)
-        except:
-            images = [product.images]
+    # Images come from product_images (loaded with the product), already in order;
+    # variants appear once the image worker has rendered them
+    media = [
+        {
+            "url": image.url,
+            "width": image.width,
+            "height": image.height,
+            "alt": image.alt,
+            "variants": json.loads(image.job.variants) if image.job and image.job.status == "done" else None,
+        }
+        for image in product.media
+    ]
     
     # Calculate total price
     total_price = product.offer_price or product.retail_price
@@ -103,7 +230,8 @@ def _format_product_details(product):
             "delivery_charges": product.delivery_charges,
             "stock": product.stock,
             "status": product.status,
-            "images": images,
+            "images": [image["url"] for image in media],
+            "media": media,
             "available": product.available,
             "sold": product.sold,
             "category": product.category.name if product.category else None,
@@ -125,7 +253,11 @@ def _format_product_details(product):
 
 
 @router.get("/details/{product_id}")
-def get_product_details_for_order(product_id: int, db: Session = Depends(get_db)):
+async def get_product_details_for_order(
+    product_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     Get detailed product information for order placement and WhatsApp contact by ID.
     
@@ -147,6 +279,8 @@ def get_product_details_for_order(product_id: int, db: Session = Depends(get_db)
             "stock": 5,
             "status": "available",
             "images": ["ring1.jpg", "ring2.jpg"],
+            "media": [{"url": "ring1.jpg", "width": 1200, "height": 1200, "alt": "Front view",
+                       "variants": {"thumb": {"webp": "/media/variants/...", "jpeg": "..."}, "medium": {...}}}, ...],
             "category": "Rings"
         },
         "whatsapp_info": {
@@ -161,214 +295,170 @@ def get_product_details_for_order(product_id: int, db: Session = Depends(get_db)
         }
     }
     """
-    product = db.query(ProductModel).join(Category).filter(ProductModel.id == product_id).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    
-    return _format_product_details(product)
+    return await _product_details(db, request, ("id", product_id), ProductModel.id == product_id)
 
 
-# Convenience endpoints for each category
-@router.get("/rings", response_model=List[Product])
-def read_rings(
-    db: Session = Depends(get_db),
-    status: Optional[str] = Query(None, description="Filter by status"),
-    limit: Optional[int] = Query(100, description="Limit number of rings returned")
-):
-    """Get all rings (convenience endpoint)."""
-    query = db.query(ProductModel).join(Category).filter(Category.name.ilike("%ring%"))
-    
-    if status:
-        query = query.filter(ProductModel.status == status)
-    
-    return query.limit(limit).all()
-
-
-@router.get("/pendants", response_model=List[Product])
-def read_pendants(
-    db: Session = Depends(get_db),
-    status: Optional[str] = Query(None, description="Filter by status"),
-    limit: Optional[int] = Query(100, description="Limit number of pendants returned")
-):
-    """Get all pendants (convenience endpoint)."""
-    query = db.query(ProductModel).join(Category).filter(Category.name.ilike("%pendant%"))
-    
-    if status:
-        query = query.filter(ProductModel.status == status)
-    
-    return query.limit(limit).all()
-
-
-@router.get("/bracelets", response_model=List[Product])
-def read_bracelets(
-    db: Session = Depends(get_db),
-    status: Optional[str] = Query(None, description="Filter by status"),
-    limit: Optional[int] = Query(100, description="Limit number of bracelets returned")
-):
-    """Get all bracelets (convenience endpoint)."""
-    query = db.query(ProductModel).join(Category).filter(Category.name.ilike("%bracelet%"))
-    
+async def _category_products(db: AsyncSession, slug: str, status: Optional[str], limit: int):
+    """(etag, products) for a category through the slug map; None when the slug is unknown."""
+    category_id = await category_slugs.resolve(db, slug)
+    if category_id is None:
+        return None
+    query = select(ProductModel).filter(ProductModel.category_id == category_id)
     if status:
         query = query.filter(ProductModel.status == status)
-    
-    return query.limit(limit).all()
+    query = query.order_by(ProductModel.created_at, ProductModel.id).limit(limit)
+    return await _cached_products(db, ("category", category_id, status, limit), query)
 
 
-@router.get("/bangles", response_model=List[Product])
-def read_bangles(
-    db: Session = Depends(get_db),
+@router.get("/category/{slug}", response_model=List[Product])
+async def read_products_by_category(
+    slug: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     status: Optional[str] = Query(None, description="Filter by status"),
-    limit: Optional[int] = Query(100, description="Limit number of bangles returned")
-):
-    """Get all bangles (convenience endpoint)."""
-    query = db.query(ProductModel).join(Category).filter(Category.name.ilike("%bangle%"))
-    
-    if status:
-        query = query.filter(ProductModel.status == status)
-    
-    return query.limit(limit).all()
-
-
-@router.get("/anklets", response_model=List[Product])
-def read_anklets(
-    db: Session = Depends(get_db),
-    status: Optional[str] = Query(None, description="Filter by status"),
-    limit: Optional[int] = Query(100, description="Limit number of anklets returned")
-):
-    """Get all anklets (convenience endpoint)."""
-    query = db.query(ProductModel).join(Category).filter(Category.name.ilike("%anklet%"))
-    
-    if status:
-        query = query.filter(ProductModel.status == status)
-    
-    return query.limit(limit).all()
-
-
-@router.get("/ear-studs", response_model=List[Product])
-def read_ear_studs(
-    db: Session = Depends(get_db),
-    status: Optional[str] = Query(None, description="Filter by status"),
-    limit: Optional[int] = Query(100, description="Limit number of ear studs returned")
-):
-    """Get all ear studs (convenience endpoint)."""
-    query = db.query(ProductModel).join(Category).filter(Category.name.ilike("%ear stud%"))
-    
-    if status:
-        query = query.filter(ProductModel.status == status)
-    
-    return query.limit(limit).all()
-
-
-@router.get("/earrings", response_model=List[Product])
-def read_earrings(
-    db: Session = Depends(get_db),
-    status: Optional[str] = Query(None, description="Filter by status"),
-    limit: Optional[int] = Query(100, description="Limit number of earrings returned")
-):
-    """Get all earrings (convenience endpoint)."""
-    query = db.query(ProductModel).join(Category).filter(Category.name.ilike("%earing%"))
-    
-    if status:
-        query = query.filter(ProductModel.status == status)
-    
-    return query.limit(limit).all()
-
-
-@router.get("/hoops", response_model=List[Product])
-def read_hoops(
-    db: Session = Depends(get_db),
-    status: Optional[str] = Query(None, description="Filter by status"),
-    limit: Optional[int] = Query(100, description="Limit number of hoops returned")
-):
-    """Get all hoops (convenience endpoint)."""
-    query = db.query(ProductModel).join(Category).filter(Category.name.ilike("%hoop%"))
-    
-    if status:
-        query = query.filter(ProductModel.status == status)
-    
-    return query.limit(limit).all()
-
-
-@router.get("/hair-accessories", response_model=List[Product])
-def read_hair_accessories(
-    db: Session = Depends(get_db),
-    status: Optional[str] = Query(None, description="Filter by status"),
-    limit: Optional[int] = Query(100, description="Limit number of hair accessories returned")
+    limit: Optional[int] = Query(100, description="Limit number of products returned")
 ):
-    """Get all hair accessories (convenience endpoint)."""
-    query = db.query(ProductModel).join(Category).filter(Category.name.ilike("%hair%"))
-    
-    if status:
-        query = query.filter(ProductModel.status == status)
+    """
+    Get all products in a category by its slug.
     
-    return query.limit(limit).all()
-
-
-@router.get("/wall-frames", response_model=List[Product])
-def read_wall_frames(
-    db: Session = Depends(get_db),
-    status: Optional[str] = Query(None, description="Filter by status"),
-    limit: Optional[int] = Query(100, description="Limit number of wall frames returned")
+    Examples:
+    - GET /products/category/rings
+    - GET /products/category/ear-studs?status=available
+    """
+    entry = await _category_products(db, slug, status, limit)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Category not found")
+    return conditional(request, response, *entry)
+
+
+def _make_category_route(slug: str, label: str):
+    async def read_category(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_async_db),
+        status: Optional[str] = Query(None, description="Filter by status"),
+        limit: Optional[int] = Query(100, description=f"Limit number of {label} returned")
+    ):
+        entry = await _category_products(db, slug, status, limit)
+        if entry is None:
+            return []
+        return conditional(request, response, *entry)
+
+    read_category.__name__ = f"read_{slug.replace('-', '_')}"
+    read_category.__doc__ = f"Get all {label} (convenience endpoint)."
+    return read_category
+
+
+# Convenience endpoints for each category, served by the slug engine above
+CATEGORY_ROUTES = {
+    "rings": "rings",
+    "pendants": "pendants",
+    "bracelets": "bracelets",
+    "bangles": "bangles",
+    "anklets": "anklets",
+    "ear-studs": "ear studs",
+    "earrings": "earrings",
+    "hoops": "hoops",
+    "hair-accessories": "hair accessories",
+    "wall-frames": "wall frames",
+    "under-299": "products under 299",
+    "combos": "combos",
+}
+
+for _slug, _label in CATEGORY_ROUTES.items():
+    router.add_api_route(f"/{_slug}", _make_category_route(_slug, _label), methods=["GET"], response_model=List[Product])
+
+
+products_fts = table("products_fts", column("rowid"))
+
+_SEARCH_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def _fts_match(q: str) -> Optional[str]:
+    """Turn free text into an FTS5 query: every word must match, as a prefix, with operators quoted away."""
+    tokens = _SEARCH_TOKEN.findall(q.lower())
+    return " ".join(f'"{token}"*' for token in tokens) or None
+
+
+@router.get("/search", response_model=List[ProductSearchHit])
+async def search_products(
+    q: str = Query(..., min_length=1, description="Words to search for in name, full name and description"),
+    db: AsyncSession = Depends(get_async_db),
+    category_id: Optional[int] = Query(None, description="Filter by category ID"),
+    status: Optional[str] = Query(None, description="Filter by status: available, out_of_stock, sold"),
+    limit: int = Query(20, ge=1, le=100, description="Limit number of products returned"),
+    offset: int = Query(0, ge=0, description="Offset for pagination")
 ):
-    """Get all wall frames (convenience endpoint)."""
-    query = db.query(ProductModel).join(Category).filter(Category.name.ilike("%wall frame%"))
-    
-    if status:
-        query = query.filter(ProductModel.status == status)
+    """
+    Full-text product search, best matches first.
     
-    return query.limit(limit).all()
-
-
-@router.get("/under-299", response_model=List[Product])
-def read_under_299(
-    db: Session = Depends(get_db),
-    status: Optional[str] = Query(None, description="Filter by status"),
-    limit: Optional[int] = Query(100, description="Limit number of products returned")
-):
-    """Get all products under 299 (convenience endpoint)."""
-    query = db.query(ProductModel).join(Category).filter(Category.name.ilike("%under 299%"))
+    Matches are ranked with bm25 (name weighs more than full name, which weighs more
+    than description). Each hit carries a snippet with the matched words in [brackets].
     
+    Examples:
+    - GET /products/search?q=gold ring
+    - GET /products/search?q=zirc&status=available&category_id=1
+    """
+    if not is_sqlite:
+        raise HTTPException(status_code=501, detail="Search requires the SQLite FTS5 index")
+    match = _fts_match(q)
+    if match is None:
+        return []
+    
+    fts = literal_column("products_fts")
+    rank = func.bm25(fts, 10.0, 5.0, 1.0).label("rank")
+    snippet = func.snippet(fts, -1, "[", "]", "…", 12).label("snippet")
+    query = (
+        select(ProductModel, rank, snippet)
+        .join_from(products_fts, ProductModel, ProductModel.id == products_fts.c.rowid)
+        .where(text("products_fts MATCH :match").bindparams(match=match))
+    )
+    if category_id:
+        query = query.filter(ProductModel.category_id == category_id)
     if status:
         query = query.filter(ProductModel.status == status)
+    query = query.order_by(rank).limit(limit).offset(offset)
     
-    return query.limit(limit).all()
+    rows = await db.execute(query)
+    hits = [
+        ProductSearchHit.model_validate({**Product.model_validate(product).model_dump(), "rank": hit_rank, "snippet": hit_snippet})
+        for product, hit_rank, hit_snippet in rows
+    ]
+    return RawJSONResponse(_SEARCH_HITS.dump_json(hits))
 
 
-@router.get("/combos", response_model=List[Product])
-def read_combos(
-    db: Session = Depends(get_db),
-    status: Optional[str] = Query(None, description="Filter by status"),
-    limit: Optional[int] = Query(100, description="Limit number of combos returned")
-):
-    """Get all combos (convenience endpoint)."""
-    query = db.query(ProductModel).join(Category).filter(Category.name.ilike("%combo%"))
-    
-    if status:
-        query = query.filter(ProductModel.status == status)
-    
-    return query.limit(limit).all()
+@router.get("/cache/stats", dependencies=[Depends(require_admin)])
+async def read_catalog_cache_stats():
+    """Get hit/miss counters for the in-process catalog cache (admin only)."""
+    return catalog_cache.stats()
 
 
 @router.get("/by-key/{unique_key}", response_model=Product)
-def read_product_by_key(unique_key: str, db: Session = Depends(get_db)):
+async def read_product_by_key(
+    unique_key: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
     """Get a specific product by unique key."""
-    product = db.query(ProductModel).filter(ProductModel.unique_key == unique_key).first()
+    product = (await db.scalars(select(ProductModel).filter(ProductModel.unique_key == unique_key))).first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    return conditional(request, response, product_etag(product.id, product.updated_at, product.created_at), product)
 
 
 @router.get("/{product_id}", response_model=Product)
-def read_product(product_id: int, db: Session = Depends(get_db)):
+async def read_product(product_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
     """Get a specific product by ID."""
-    product = db.query(ProductModel).filter(ProductModel.id == product_id).first()
+    product = await db.get(ProductModel, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    return conditional(request, response, product_etag(product.id, product.updated_at, product.created_at), product)
 
 
 @router.post("/", response_model=Product, dependencies=[Depends(require_admin)])
-def create_product(product: ProductCreate, db: Session = Depends(get_db)):
+async def create_product(product: ProductCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Create a new product (admin only).
     
@@ -387,13 +477,14 @@ def create_product(product: ProductCreate, db: Session = Depends(get_db)):
     
     db_product = ProductModel(**product_data)
     db.add(db_product)
-    db.commit()
-    db.refresh(db_product)
+    await db.commit()
+    await db.refresh(db_product)
+    catalog_cache.clear()
     return db_product
 
 
 @router.put("/{product_id}", response_model=Product, dependencies=[Depends(require_admin)])
-def update_product(product_id: int, product: ProductUpdate, db: Session = Depends(get_db)):
+async def update_product(product_id: int, product: ProductUpdate, db: AsyncSession = Depends(get_async_db)):
     """
     Update a product (admin only).
     
@@ -402,20 +493,22 @@ def update_product(product_id: int, product: ProductUpdate, db: Session = Depend
     - GET /products/{category_name} (if it matches the category)
     - GET /products/?category_name={category_name} (filtered results)
     """
-    db_product = db.query(ProductModel).filter(ProductModel.id == product_id).first()
+    db_product = await db.get(ProductModel, product_id)
     if not db_product:
         raise HTTPException(status_code=404, detail="Product not found")
 
     product_data = product.dict(exclude_unset=True)
     for key, value in product_data.items():
         setattr(db_product, key, value)
-    db.commit()
-    db.refresh(db_product)
+    await db.commit()
+    await db.refresh(db_product)
+    catalog_cache.clear()
+    _forget_product_details(db_product)
     return db_product
 
 
 @router.delete("/{product_id}", dependencies=[Depends(require_admin)])
-def delete_product(product_id: int, db: Session = Depends(get_db)):
+async def delete_product(product_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Delete a product (admin only).
     
@@ -424,11 +517,13 @@ def delete_product(product_id: int, db: Session = Depends(get_db)):
     - GET /products/{category_name} (category-specific lists)
     - GET /products/?category_name={category_name} (filtered results)
     """
-    db_product = db.query(ProductModel).filter(ProductModel.id == product_id).first()
+    db_product = await db.get(ProductModel, product_id)
     if not db_product:
         raise HTTPException(status_code=404, detail="Product not found")
-    db.delete(db_product)
-    db.commit()
+    await db.delete(db_product)
+    await db.commit()
+    catalog_cache.clear()
+    _forget_product_details(db_product)
     return {"message": "Product deleted"}
 
 
@@ -0,0 +1,72 @@
+from typing import List, Optional
+
+from sqlalchemy import delete, func, select, true
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Order, OrderItem, Product, SalesDaily, ProductSalesDaily, CategorySalesDaily
+
+
+ROLLUPS = (SalesDaily, ProductSalesDaily, CategorySalesDaily)
+
+
+def _rollup_statements(order_id: Optional[int] = None) -> List:
+	"""
+	INSERT ... SELECT statements that add orders to every daily rollup.
+
+	With ``order_id`` only that order is added (the incremental path taken by
+	create_order); without it every order is aggregated in bulk (the rebuild).
+	Existing rows are incremented, so adding an order is an upsert per row.
+	"""
+	day = func.date(Order.created_at)
+	condition = Order.id == order_id if order_id is not None else true()
+	measures = (
+		func.sum(OrderItem.line_total),
+		func.sum(OrderItem.quantity),
+		func.count(Order.id.distinct()),
+	)
+	sources = {
+		SalesDaily: select(day, *measures)
+			.join(OrderItem, OrderItem.order_id == Order.id)
+			.where(condition)
+			.group_by(day),
+		ProductSalesDaily: select(day, OrderItem.product_id, *measures)
+			.join(OrderItem, OrderItem.order_id == Order.id)
+			.where(condition)
+			.group_by(day, OrderItem.product_id),
+		# Category as of now: rollups attribute sales to the product's current category
+		CategorySalesDaily: select(day, Product.category_id, *measures)
+			.join(OrderItem, OrderItem.order_id == Order.id)
+			.join(Product, Product.id == OrderItem.product_id)
+			.where(condition, Product.category_id.is_not(None))
+			.group_by(day, Product.category_id),
+	}
+	statements = []
+	for table, source in sources.items():
+		keys = [column for column in table.__table__.primary_key.columns]
+		columns = [column.name for column in keys] + ["revenue", "units", "orders"]
+		statement = sqlite_insert(table).from_select(columns, source)
+		statements.append(statement.on_conflict_do_update(
+			index_elements=keys,
+			set_={
+				name: getattr(table, name) + statement.excluded[name]
+				for name in ("revenue", "units", "orders")
+			},
+		))
+	return statements
+
+
+async def record_order_sales(db: AsyncSession, order_id: int) -> None:
+	"""Add a flushed order to the rollups inside the caller's transaction."""
+	for statement in _rollup_statements(order_id):
+		await db.execute(statement)
+
+
+def rebuild_sales_rollups(engine: Engine) -> None:
+	"""Recompute every rollup from orders/order_items in one transaction."""
+	with engine.begin() as conn:
+		for table in ROLLUPS:
+			conn.execute(delete(table))
+		for statement in _rollup_statements():
+			conn.execute(statement)
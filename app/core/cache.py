@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from app.core.config import (
+	CATALOG_CACHE_TTL_SECONDS,
+	CATALOG_CACHE_MAX_ENTRIES,
+	PRODUCT_DETAILS_CACHE_MAX_ENTRIES,
+	TOKEN_CACHE_TTL_SECONDS,
+	TOKEN_CACHE_MAX_ENTRIES,
+)
+
+
+_MISSING = object()
+
+
+class TTLCache:
+	"""Bounded LRU cache whose entries also expire ``ttl`` seconds after being stored.
+
+	The cache lives in the worker process, so entries written by one uvicorn worker
+	are not seen (or invalidated) by another; the TTL bounds that staleness.
+	"""
+
+	def __init__(self, maxsize: int = 512, ttl: float = 300.0):
+		self.maxsize = maxsize
+		self.ttl = ttl
+		self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	@property
+	def enabled(self) -> bool:
+		return self.ttl > 0 and self.maxsize > 0
+
+	def get(self, key: Hashable, default: Any = None) -> Any:
+		with self._lock:
+			item = self._data.get(key, _MISSING)
+			if item is _MISSING:
+				self.misses += 1
+				return default
+			expires_at, value = item
+			if expires_at <= time.monotonic():
+				del self._data[key]
+				self.misses += 1
+				return default
+			self._data.move_to_end(key)
+			self.hits += 1
+			return value
+
+	def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+		"""Store ``value``; ``ttl`` shortens this entry's lifetime below the cache's own (never extends it)."""
+		if not self.enabled:
+			return
+		ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+		if ttl <= 0:
+			return
+		with self._lock:
+			self._data[key] = (time.monotonic() + ttl, value)
+			self._data.move_to_end(key)
+			while len(self._data) > self.maxsize:
+				self._data.popitem(last=False)
+				self.evictions += 1
+
+	def pop(self, key: Hashable, default: Any = None) -> Any:
+		with self._lock:
+			item = self._data.pop(key, _MISSING)
+		return default if item is _MISSING else item[1]
+
+	def pop_where(self, predicate: Callable[[Any], bool]) -> int:
+		"""Drop every entry whose value matches ``predicate``; a full scan, for rare invalidations."""
+		with self._lock:
+			keys = [key for key, (_, value) in self._data.items() if predicate(value)]
+			for key in keys:
+				del self._data[key]
+		return len(keys)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._data.clear()
+
+	def stats(self) -> Dict[str, Any]:
+		with self._lock:
+			lookups = self.hits + self.misses
+			return {
+				"size": len(self._data),
+				"maxsize": self.maxsize,
+				"ttl": self.ttl,
+				"hits": self.hits,
+				"misses": self.misses,
+				"evictions": self.evictions,
+				"hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+			}
+
+
+# Product listing responses, keyed on the normalized query. Cleared by every product write.
+catalog_cache = TTLCache(maxsize=CATALOG_CACHE_MAX_ENTRIES, ttl=CATALOG_CACHE_TTL_SECONDS)
+
+# Rendered /products/details payloads as (etag, JSON bytes), stored under both
+# ("id", product_id) and ("key", unique_key). Dropped per product on product writes.
+details_cache = TTLCache(maxsize=PRODUCT_DETAILS_CACHE_MAX_ENTRIES, ttl=CATALOG_CACHE_TTL_SECONDS)
+
+# Verified bearer tokens -> CurrentUser (see app/deps/auth.py), so repeat requests skip
+# the signature check and the users lookup. Entries never outlive the token's exp.
+token_cache = TTLCache(maxsize=TOKEN_CACHE_MAX_ENTRIES, ttl=TOKEN_CACHE_TTL_SECONDS)
@@ -3,9 +3,94 @@ import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
 
+# Async driver URL used by the async endpoints; derived from DATABASE_URL unless set explicitly.
+# SQLite only: the catalog is maintained by SQLite triggers (see app/db/migrations.py)
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite"}
+_scheme, _, _location = DATABASE_URL.partition("://")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", f"{_ASYNC_DRIVERS.get(_scheme, _scheme)}://{_location}")
+
 # Auth/JWT
 SECRET_KEY = os.getenv("SECRET_KEY", "change_me_in_production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
 
+# Password hashing: pbkdf2_sha256 cost, and the process pool that runs it off the request path.
+# Stored hashes below PASSWORD_HASH_ROUNDS are re-hashed on the next successful login.
+# PASSWORD_HASH_WORKERS=0 hashes on the web server's threadpool instead.
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "29000"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "5"))  # seconds to wait for a free worker before 503
+
+# Catalog read cache (in-process, per worker). A TTL of 0 disables caching.
+CATALOG_CACHE_TTL_SECONDS = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "300"))
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "512"))
+PRODUCT_DETAILS_CACHE_MAX_ENTRIES = int(os.getenv("PRODUCT_DETAILS_CACHE_MAX_ENTRIES", "4096"))
+
+# Verified JWT cache (per worker). The TTL also bounds how long another worker keeps
+# accepting a token after a password reset or deactivation; 0 disables the cache.
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "60"))
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "4096"))
+
+# SQLite connection profile, applied to every new connection. Set a value to "" to leave that PRAGMA at its default.
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_CACHE_SIZE = os.getenv("SQLITE_CACHE_SIZE", "-65536")  # negative = KiB, so 64 MiB of page cache
+SQLITE_MMAP_SIZE = os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))
+SQLITE_BUSY_TIMEOUT_MS = os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")
+SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+
+# Connection pool sizing (ignored for in-memory SQLite, which uses a single connection per thread)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# Cache-Control sent with ETag'd catalog responses; clients revalidate with If-None-Match
+CATALOG_CACHE_CONTROL = os.getenv("CATALOG_CACHE_CONTROL", "public, max-age=0, must-revalidate")
+
+# Rows fetched per server-side cursor round trip by the streaming exports
+EXPORT_YIELD_PER = int(os.getenv("EXPORT_YIELD_PER", "1000"))
+
+# Idempotency-Key support for POST /orders/: how long outcomes are replayable, and how long
+# a duplicate waits for the original request to finish before giving up with 409
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+# An in-flight claim whose request has not finished after this long (its worker died) can be taken over by a retry
+IDEMPOTENCY_LEASE_SECONDS = int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "60"))
+
+# Image variants: sources are product image URLs, read from IMAGE_SOURCE_ROOT when relative
+# (or fetched when http/https); variants are written under MEDIA_ROOT and served at MEDIA_URL
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", "media")
+MEDIA_URL = os.getenv("MEDIA_URL", "/media")
+IMAGE_SOURCE_ROOT = os.getenv("IMAGE_SOURCE_ROOT", os.path.join(MEDIA_ROOT, "originals"))
+# Hosts http(s) image URLs may be downloaded from ("cdn.example.com", or "*.example.com" for its subdomains);
+# empty means remote images are never fetched. Addresses that resolve to private/loopback/link-local ranges are refused.
+IMAGE_SOURCE_HOSTS = tuple(host.strip().lower() for host in os.getenv("IMAGE_SOURCE_HOSTS", "").split(",") if host.strip())
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))  # worker processes per app process; 0 disables the in-app worker
+IMAGE_POLL_SECONDS = float(os.getenv("IMAGE_POLL_SECONDS", "2"))
+IMAGE_MAX_ATTEMPTS = int(os.getenv("IMAGE_MAX_ATTEMPTS", "3"))
+IMAGE_JOB_LEASE_SECONDS = int(os.getenv("IMAGE_JOB_LEASE_SECONDS", "300"))  # a running job older than this is retried
+
+# Rate limiting: token buckets per client (verified user, else IP) and route class,
+# as "<requests>/<seconds>" (the bucket holds <requests>, refilled over <seconds>); "" turns a class off.
+# RATE_LIMIT_SQLITE_PATH shares the buckets between workers through a SQLite file instead of process memory.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_CATALOG = os.getenv("RATE_LIMIT_CATALOG", "300/60")
+RATE_LIMIT_AUTH = os.getenv("RATE_LIMIT_AUTH", "10/60")
+RATE_LIMIT_ORDERS = os.getenv("RATE_LIMIT_ORDERS", "30/60")
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", "")
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))  # in-memory buckets kept (LRU)
+# Proxies in front of the app that append to X-Forwarded-For; the client IP is the entry the outermost one added.
+# 0 ignores the header (its entries are whatever the client chose to send).
+RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "0"))
+
+# Request metrics: Prometheus text at /metrics, and the app time as a Server-Timing response header
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "1") == "1"
 
+# SQL instrumentation: statements slower than SLOW_QUERY_MS are logged with their parameters (0 disables);
+# a statement run N_PLUS_ONE_THRESHOLD times in one request is logged as a probable N+1.
+# DEBUG=1 adds the request's query count and DB time to the response headers.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+DEBUG = os.getenv("DEBUG", "0") == "1"
@@ -0,0 +1,20 @@
+import base64
+import json
+from typing import Tuple
+
+from fastapi import HTTPException
+
+
+def encode_cursor(created_at: str, row_id: int) -> str:
+	"""Opaque keyset cursor for the row at (created_at, id); created_at is the raw stored value."""
+	raw = json.dumps([created_at, row_id], separators=(",", ":")).encode()
+	return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+	try:
+		raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+		created_at, row_id = json.loads(raw)
+		return str(created_at), int(row_id)
+	except (ValueError, TypeError):
+		raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,63 @@
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import select
+
+from app.core.config import CATALOG_CACHE_CONTROL
+from app.core.responses import RawJSONResponse
+from app.models import CatalogVersion
+
+
+async def get_catalog_version(db) -> int:
+	version = await db.scalar(select(CatalogVersion.version).where(CatalogVersion.id == 1))
+	return version or 0
+
+
+def catalog_etag(version: int) -> str:
+	return f'"c{version}"'
+
+
+def product_etag(product_id: int, updated_at, created_at) -> str:
+	stamp = updated_at or created_at
+	return f'"p{product_id}-{stamp.strftime("%Y%m%d%H%M%S%f") if stamp else 0}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+	if not if_none_match:
+		return False
+	if if_none_match.strip() == "*":
+		return True
+	# Weak comparison, as RFC 9110 requires for If-None-Match
+	for tag in if_none_match.split(","):
+		tag = tag.strip()
+		if tag.startswith("W/"):
+			tag = tag[2:]
+		if tag == etag:
+			return True
+	return False
+
+
+def validator_headers(etag: str) -> dict:
+	return {"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL}
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+	"""A bare 304 when the client already holds ``etag``, else None."""
+	if etag_matches(request.headers.get("if-none-match"), etag):
+		return Response(status_code=304, headers=validator_headers(etag))
+	return None
+
+
+def conditional(request: Request, response: Response, etag: str, payload):
+	"""
+	Return a 304 when the client already holds ``etag``, else ``payload`` with validator headers.
+
+	``payload`` may be pre-encoded JSON bytes, which are sent as-is.
+	"""
+	unchanged = not_modified(request, etag)
+	if unchanged is not None:
+		return unchanged
+	if isinstance(payload, bytes):
+		return RawJSONResponse(payload, headers=validator_headers(etag))
+	response.headers.update(validator_headers(etag))
+	return payload
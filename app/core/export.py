@@ -0,0 +1,102 @@
+import csv
+import io
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Iterable, List, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+
+from app.core.config import EXPORT_YIELD_PER
+from app.db.session import AsyncSessionLocal
+
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+# Output is flushed in chunks of roughly this size
+CHUNK_SIZE = 64 * 1024
+
+
+async def stream_rows(statement, yield_per: int = EXPORT_YIELD_PER) -> AsyncIterator[dict]:
+	"""
+	Yield result rows as mappings from a server-side cursor, ``yield_per`` at a time.
+
+	The rows are read in a dedicated session: the request-scoped one may be
+	closed before a streaming response has finished sending.
+	"""
+	async with AsyncSessionLocal() as db:
+		result = await db.stream(statement.execution_options(yield_per=yield_per))
+		async for partition in result.mappings().partitions():
+			for row in partition:
+				yield dict(row)
+
+
+def _csv_value(value):
+	if isinstance(value, datetime):
+		return value.isoformat()
+	return value
+
+
+async def _ndjson(records: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+	buffer = bytearray()
+	async for record in records:
+		buffer += to_json(record)
+		buffer += b"\n"
+		if len(buffer) >= CHUNK_SIZE:
+			yield bytes(buffer)
+			buffer.clear()
+	if buffer:
+		yield bytes(buffer)
+
+
+async def _csv(records: AsyncIterator[dict], columns: List[str]) -> AsyncIterator[bytes]:
+	buffer = io.StringIO()
+	writer = csv.writer(buffer)
+	writer.writerow(columns)
+	async for record in records:
+		writer.writerow([_csv_value(record[name]) for name in columns])
+		if buffer.tell() >= CHUNK_SIZE:
+			yield buffer.getvalue().encode()
+			buffer.seek(0)
+			buffer.truncate()
+	if buffer.tell():
+		yield buffer.getvalue().encode()
+
+
+async def _gzip(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+	compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+	async for chunk in chunks:
+		data = compressor.compress(chunk)
+		if data:
+			yield data
+	yield compressor.flush()
+
+
+def export_response(
+	records: AsyncIterator[dict],
+	fmt: str,
+	filename: str,
+	columns: Optional[Iterable[str]] = None,
+	gzip: bool = False,
+) -> StreamingResponse:
+	"""
+	Stream ``records`` as NDJSON or CSV (header from ``columns``), optionally gzipped.
+
+	Rows are encoded and sent as they are read, so memory stays flat however
+	large the export is. Gzipped output is a ``.gz`` download rather than a
+	Content-Encoding, so clients get exactly the file they asked for.
+	"""
+	if fmt not in EXPORT_FORMATS:
+		raise HTTPException(status_code=400, detail=f"Unsupported export format; use one of: {', '.join(EXPORT_FORMATS)}")
+	body = _ndjson(records) if fmt == "ndjson" else _csv(records, list(columns))
+	media_type = EXPORT_FORMATS[fmt]
+	filename = f"{filename}.{fmt}"
+	if gzip:
+		body = _gzip(body)
+		media_type = "application/gzip"
+		filename += ".gz"
+	return StreamingResponse(
+		body,
+		media_type=media_type,
+		headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+	)
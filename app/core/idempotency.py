@@ -0,0 +1,118 @@
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_WAIT_SECONDS, IDEMPOTENCY_LEASE_SECONDS
+from app.core.responses import RawJSONResponse
+from app.models import IdempotencyKey
+
+
+MAX_KEY_LENGTH = 255
+# Polling back-off while a duplicate waits for the original request
+_FIRST_POLL_SECONDS = 0.02
+_MAX_POLL_SECONDS = 0.25
+
+
+def request_fingerprint(payload) -> str:
+	"""Stable hash of a request body, to catch a key being reused for a different request."""
+	return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def _expired(record: IdempotencyKey) -> bool:
+	expires_at = record.expires_at
+	if expires_at.tzinfo is None:
+		# SQLite hands back the stored UTC time without its offset
+		expires_at = expires_at.replace(tzinfo=timezone.utc)
+	return expires_at < datetime.now(timezone.utc)
+
+
+async def _try_claim(db: AsyncSession, key: str, fingerprint: str) -> bool:
+	now = datetime.now(timezone.utc)
+	# Expired rows are purged by whoever claims next: outcomes past their TTL, and
+	# in-flight claims past their lease (including a stale row for this key)
+	await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < now))
+	db.add(IdempotencyKey(
+		key=key,
+		fingerprint=fingerprint,
+		created_at=now,
+		# Until the outcome is stored, the row is only a lease; store_response() extends it to the TTL
+		expires_at=now + timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS),
+	))
+	try:
+		await db.commit()
+		return True
+	except IntegrityError:
+		await db.rollback()
+		return False
+
+
+async def claim_idempotency_key(db: AsyncSession, key: str, fingerprint: str) -> Optional[IdempotencyKey]:
+	"""
+	Claim ``key`` for the current request, or return the original request's outcome.
+
+	``None`` means the caller owns the key: it must run the request and then
+	either store_response() or release_idempotency_key(). If the original
+	request is still in flight this waits for it (it may be on another worker,
+	so the table is polled) rather than running the request a second time.
+	A claim still in flight after IDEMPOTENCY_LEASE_SECONDS is presumed dead
+	(its worker crashed) and taken over.
+	"""
+	if len(key) > MAX_KEY_LENGTH:
+		raise HTTPException(status_code=400, detail=f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters")
+	loop = asyncio.get_running_loop()
+	deadline = loop.time() + IDEMPOTENCY_WAIT_SECONDS
+	delay = _FIRST_POLL_SECONDS
+	claimed = await _try_claim(db, key, fingerprint)
+	while not claimed:
+		record = await db.get(IdempotencyKey, key, populate_existing=True)
+		if record is None:
+			# The original request failed and released the key: take it over
+			claimed = await _try_claim(db, key, fingerprint)
+			continue
+		if record.fingerprint != fingerprint:
+			raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+		if record.status_code is not None:
+			return record
+		if _expired(record):
+			# The original request's worker died before finishing: run it here
+			claimed = await _try_claim(db, key, fingerprint)
+			continue
+		if loop.time() >= deadline:
+			raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+		await asyncio.sleep(delay)
+		delay = min(delay * 2, _MAX_POLL_SECONDS)
+	return None
+
+
+async def store_response(db: AsyncSession, key: str, status_code: int, body: bytes) -> None:
+	"""Record the outcome for ``key`` in the caller's transaction, so it commits together with the work."""
+	await db.execute(
+		update(IdempotencyKey)
+		.where(IdempotencyKey.key == key)
+		.values(
+			status_code=status_code,
+			response_body=body,
+			expires_at=datetime.now(timezone.utc) + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS),
+		)
+	)
+
+
+async def release_idempotency_key(db: AsyncSession, key: str) -> None:
+	"""Forget an unfinished claim so a retry can run the request again."""
+	await db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)))
+	await db.commit()
+
+
+def replay_response(record: IdempotencyKey) -> RawJSONResponse:
+	return RawJSONResponse(
+		record.response_body,
+		status_code=record.status_code,
+		headers={"Idempotent-Replayed": "true"},
+	)
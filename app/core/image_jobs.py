@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, case, func, or_, select, update
+
+from app.core.cache import catalog_cache, details_cache
+from app.core.config import (
+	MEDIA_ROOT,
+	MEDIA_URL,
+	IMAGE_SOURCE_ROOT,
+	IMAGE_SOURCE_HOSTS,
+	IMAGE_WORKERS,
+	IMAGE_POLL_SECONDS,
+	IMAGE_MAX_ATTEMPTS,
+	IMAGE_JOB_LEASE_SECONDS,
+)
+from app.core.images import render_variants
+from app.db.session import AsyncSessionLocal
+from app.models import ImageJob, Product, ProductImage
+
+
+logger = logging.getLogger(__name__)
+
+
+def _claimable(now: datetime):
+	# Pending jobs, plus running ones whose worker has not reported back within the lease (it died)
+	return or_(
+		ImageJob.status == "pending",
+		and_(ImageJob.status == "running", ImageJob.updated_at < now - timedelta(seconds=IMAGE_JOB_LEASE_SECONDS)),
+	)
+
+
+def _media_url(relative_path: str) -> str:
+	return f"{MEDIA_URL.rstrip('/')}/{relative_path}"
+
+
+class ImageWorker:
+	"""
+	Feeds queued image_jobs to a process pool and records the results.
+
+	Jobs live in the database, so they survive restarts and several app
+	processes can share the queue: each job is claimed with a conditional
+	UPDATE, and a claim that is not completed within IMAGE_JOB_LEASE_SECONDS
+	becomes claimable again.
+	"""
+
+	def __init__(self, processes: int = IMAGE_WORKERS, poll_seconds: float = IMAGE_POLL_SECONDS):
+		self.processes = max(processes, 1)
+		self.poll_seconds = poll_seconds
+		self._executor: Optional[ProcessPoolExecutor] = None
+		self._task: Optional[asyncio.Task] = None
+
+	def _pool(self) -> ProcessPoolExecutor:
+		if self._executor is None:
+			# spawn: children import only app.core.images instead of inheriting the server's threads and sockets
+			self._executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=multiprocessing.get_context("spawn"))
+		return self._executor
+
+	async def start(self) -> None:
+		self._task = asyncio.create_task(self._run())
+
+	async def stop(self) -> None:
+		if self._task is not None:
+			self._task.cancel()
+			try:
+				await self._task
+			except asyncio.CancelledError:
+				pass
+			self._task = None
+		self.close()
+
+	def close(self) -> None:
+		if self._executor is not None:
+			self._executor.shutdown(wait=False, cancel_futures=True)
+			self._executor = None
+
+	async def _run(self) -> None:
+		while True:
+			try:
+				processed = await self.run_pending()
+			except asyncio.CancelledError:
+				raise
+			except Exception:
+				logger.exception("Image worker iteration failed")
+				processed = 0
+			if not processed:
+				await asyncio.sleep(self.poll_seconds)
+
+	async def _claim(self, limit: int) -> List[str]:
+		now = datetime.now(timezone.utc)
+		claimed = []
+		async with AsyncSessionLocal() as db:
+			candidates = (await db.scalars(
+				select(ImageJob.source).where(_claimable(now)).order_by(ImageJob.updated_at).limit(limit)
+			)).all()
+			for source in candidates:
+				result = await db.execute(
+					update(ImageJob)
+					.where(ImageJob.source == source, _claimable(now))
+					.values(status="running", attempts=ImageJob.attempts + 1, updated_at=now)
+				)
+				if result.rowcount:
+					claimed.append(source)
+			await db.commit()
+		return claimed
+
+	async def run_pending(self) -> int:
+		"""Render one batch of claimable jobs; returns how many were processed."""
+		sources = await self._claim(self.processes * 2)
+		if not sources:
+			return 0
+		loop = asyncio.get_running_loop()
+		futures = [
+			loop.run_in_executor(self._pool(), render_variants, source, IMAGE_SOURCE_ROOT, MEDIA_ROOT, IMAGE_SOURCE_HOSTS)
+			for source in sources
+		]
+		results = await asyncio.gather(*futures, return_exceptions=True)
+		await self._record(dict(zip(sources, results)))
+		return len(sources)
+
+	async def _record(self, results: Dict[str, object]) -> None:
+		now = datetime.now(timezone.utc)
+		async with AsyncSessionLocal() as db:
+			for source, result in results.items():
+				if isinstance(result, BaseException):
+					logger.warning("Image variants failed for %s: %s", source, result)
+					await db.execute(
+						update(ImageJob)
+						.where(ImageJob.source == source)
+						.values(
+							status=case((ImageJob.attempts >= IMAGE_MAX_ATTEMPTS, "failed"), else_="pending"),
+							error=str(result) or type(result).__name__,
+							updated_at=now,
+						)
+					)
+					continue
+				variants = {
+					name: {fmt: _media_url(path) for fmt, path in formats.items()}
+					for name, formats in result["variants"].items()
+				}
+				await db.execute(
+					update(ImageJob)
+					.where(ImageJob.source == source)
+					.values(
+						status="done",
+						error=None,
+						width=result["width"],
+						height=result["height"],
+						thumbnail=variants.get("thumb", {}).get("webp"),
+						variants=json.dumps(variants),
+						updated_at=now,
+					)
+				)
+				# Fill in dimensions the product data did not provide
+				await db.execute(
+					update(ProductImage)
+					.where(ProductImage.url == source, ProductImage.width.is_(None))
+					.values(width=result["width"], height=result["height"])
+				)
+			# New variant URLs change product payloads: bump updated_at so their ETags change
+			product_ids = (await db.scalars(
+				select(ProductImage.product_id).where(ProductImage.url.in_(list(results))).distinct()
+			)).all()
+			if product_ids:
+				await db.execute(
+					update(Product).where(Product.id.in_(product_ids)).values(updated_at=now),
+					execution_options={"synchronize_session": False},
+				)
+				keys = (await db.scalars(select(Product.unique_key).where(Product.id.in_(product_ids)))).all()
+			await db.commit()
+		if product_ids:
+			catalog_cache.clear()
+			for product_id in product_ids:
+				details_cache.pop(("id", product_id))
+			for unique_key in keys:
+				details_cache.pop(("key", unique_key))
+
+
+async def image_job_counts(db) -> Dict[str, int]:
+	rows = await db.execute(select(ImageJob.status, func.count()).group_by(ImageJob.status))
+	counts = {"pending": 0, "running": 0, "done": 0, "failed": 0}
+	counts.update({status: count for status, count in rows})
+	return counts
+
+
+async def requeue_image_jobs(db, failed_only: bool = True) -> int:
+	"""Put jobs back in the queue (only failed ones, or all of them to re-render every variant)."""
+	query = update(ImageJob).values(status="pending", attempts=0, error=None, updated_at=datetime.now(timezone.utc))
+	if failed_only:
+		query = query.where(ImageJob.status == "failed")
+	else:
+		query = query.where(ImageJob.status != "running")
+	result = await db.execute(query)
+	await db.commit()
+	return result.rowcount
@@ -0,0 +1,162 @@
+"""
+Rendering of product image variants.
+
+Runs inside the image worker's process pool, so this module only imports the
+standard library at the top: pool processes are spawned and import nothing else.
+"""
+import hashlib
+import http.client
+import io
+import ipaddress
+import os
+import urllib.parse
+import urllib.request
+from typing import Dict, Tuple
+
+# Longest edge, in pixels, of each variant
+VARIANT_SIZES = {"thumb": 320, "medium": 800}
+# Every size is written in each format; WebP for modern clients, JPEG as the fallback
+VARIANT_FORMATS = {"webp": "webp", "jpeg": "jpg"}
+MAX_SOURCE_BYTES = 25 * 1024 * 1024
+
+
+def variant_dir(source: str) -> str:
+	"""Directory (relative to MEDIA_ROOT) holding the variants of ``source``: one per distinct URL."""
+	digest = hashlib.sha1(source.encode()).hexdigest()
+	return f"variants/{digest[:2]}/{digest}"
+
+
+class _PeerCheck:
+	"""Refuses the connection unless the address actually connected to is public, whatever DNS said earlier."""
+
+	def connect(self):
+		super().connect()
+		address = ipaddress.ip_address(self.sock.getpeername()[0].split("%")[0])
+		if address.version == 6 and address.ipv4_mapped:
+			address = address.ipv4_mapped
+		if not address.is_global or address.is_multicast:
+			self.sock.close()
+			raise ValueError(f"image host {self.host} resolves to non-public address {address}")
+
+
+class _CheckedHTTPConnection(_PeerCheck, http.client.HTTPConnection):
+	pass
+
+
+class _CheckedHTTPSConnection(_PeerCheck, http.client.HTTPSConnection):
+	pass
+
+
+class _CheckedHTTPHandler(urllib.request.HTTPHandler):
+	def http_open(self, req):
+		return self.do_open(_CheckedHTTPConnection, req)
+
+
+class _CheckedHTTPSHandler(urllib.request.HTTPSHandler):
+	def https_open(self, req):
+		return self.do_open(_CheckedHTTPSConnection, req, context=self._context)
+
+
+class _CheckedRedirectHandler(urllib.request.HTTPRedirectHandler):
+	def __init__(self, allowed_hosts: Tuple[str, ...]):
+		self.allowed_hosts = allowed_hosts
+
+	def redirect_request(self, req, fp, code, msg, headers, newurl):
+		_check_url(newurl, self.allowed_hosts)
+		return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+def _check_url(url: str, allowed_hosts: Tuple[str, ...]) -> None:
+	parts = urllib.parse.urlsplit(url)
+	host = (parts.hostname or "").lower()
+	if parts.scheme not in ("http", "https"):
+		raise ValueError(f"image URL scheme {parts.scheme!r} is not allowed")
+	if not any(host == allowed or (allowed.startswith("*.") and host.endswith(allowed[1:])) for allowed in allowed_hosts):
+		raise ValueError(f"image host {host!r} is not in IMAGE_SOURCE_HOSTS")
+
+
+def _download(url: str, allowed_hosts: Tuple[str, ...]) -> bytes:
+	"""
+	GET ``url`` from an allowed host, refusing non-public addresses.
+
+	The host is checked against the allowlist for the URL and every redirect,
+	and the address is checked on each connection after it is made, so a DNS
+	answer that changes between lookups cannot point the request inside the
+	network. Environment proxies are ignored for the same reason.
+	"""
+	_check_url(url, allowed_hosts)
+	opener = urllib.request.OpenerDirector()
+	for handler in (
+		urllib.request.ProxyHandler({}),
+		urllib.request.UnknownHandler(),
+		_CheckedHTTPHandler(),
+		_CheckedHTTPSHandler(),
+		urllib.request.HTTPDefaultErrorHandler(),
+		_CheckedRedirectHandler(allowed_hosts),
+		urllib.request.HTTPErrorProcessor(),
+	):
+		opener.add_handler(handler)
+	with opener.open(url, timeout=30) as response:
+		length = response.headers.get("Content-Length")
+		if length is not None and length.isdigit() and int(length) > MAX_SOURCE_BYTES:
+			raise ValueError("image is larger than 25 MiB")
+		return response.read(MAX_SOURCE_BYTES + 1)
+
+
+def _read_source(source: str, source_root: str, allowed_hosts: Tuple[str, ...]) -> bytes:
+	if source.startswith(("http://", "https://")):
+		data = _download(source, allowed_hosts)
+	else:
+		root = os.path.abspath(source_root)
+		path = os.path.abspath(os.path.join(root, source.lstrip("/")))
+		if os.path.commonpath([root, path]) != root:
+			raise ValueError("image path escapes IMAGE_SOURCE_ROOT")
+		with open(path, "rb") as handle:
+			data = handle.read(MAX_SOURCE_BYTES + 1)
+	if len(data) > MAX_SOURCE_BYTES:
+		raise ValueError("image is larger than 25 MiB")
+	return data
+
+
+def _save(image, path: str, fmt: str) -> None:
+	# Write next to the target and rename, so a half-written file is never served
+	tmp = f"{path}.tmp"
+	if fmt == "jpeg":
+		image.convert("RGB").save(tmp, "JPEG", quality=82, optimize=True, progressive=True)
+	else:
+		image.save(tmp, "WEBP", quality=80, method=4)
+	os.replace(tmp, path)
+
+
+def render_variants(source: str, source_root: str, media_root: str, allowed_hosts: Tuple[str, ...] = ()) -> Dict:
+	"""
+	Write every size/format variant of ``source`` under ``media_root``.
+
+	http(s) sources are only downloaded from ``allowed_hosts`` (IMAGE_SOURCE_HOSTS).
+
+	Returns the original's dimensions and the variants' paths relative to
+	media_root: {"width": w, "height": h, "variants": {"thumb": {"webp": path, ...}, ...}}.
+	"""
+	try:
+		from PIL import Image, ImageOps
+	except ImportError:
+		raise RuntimeError("Pillow is not installed; pip install Pillow to generate image variants")
+
+	data = _read_source(source, source_root, allowed_hosts)
+	relative_dir = variant_dir(source)
+	os.makedirs(os.path.join(media_root, relative_dir), exist_ok=True)
+	with Image.open(io.BytesIO(data)) as opened:
+		image = ImageOps.exif_transpose(opened)
+		if image.mode not in ("RGB", "RGBA"):
+			image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+		width, height = image.size
+		variants = {}
+		for name, size in VARIANT_SIZES.items():
+			resized = image.copy()
+			resized.thumbnail((size, size), Image.Resampling.LANCZOS)
+			variants[name] = {}
+			for fmt, extension in VARIANT_FORMATS.items():
+				relative_path = f"{relative_dir}/{name}.{extension}"
+				_save(resized, os.path.join(media_root, relative_path), fmt)
+				variants[name][fmt] = relative_path
+	return {"width": width, "height": height, "variants": variants}
@@ -0,0 +1,35 @@
+import math
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+
+
+class RawJSONResponse(Response):
+	"""
+	Response whose body is already encoded JSON, e.g. from a precompiled
+	pydantic ``TypeAdapter.dump_json``. Returning it skips FastAPI's
+	response_model validation and jsonable_encoder pass, which dominate
+	the cost of large list responses.
+	"""
+	media_type = "application/json"
+
+
+def _finite(value):
+	if isinstance(value, float) and not math.isfinite(value):
+		return str(value)
+	if isinstance(value, dict):
+		return {key: _finite(item) for key, item in value.items()}
+	if isinstance(value, (list, tuple)):
+		return [_finite(item) for item in value]
+	return value
+
+
+async def validation_error_handler(request: Request, exc: RequestValidationError) -> JSONResponse:
+	"""
+	FastAPI's default 422 body, except that rejected NaN/Infinity inputs are
+	echoed as strings: JSON has no literal for them, so the default handler
+	fails to encode its own error and answers 500.
+	"""
+	return JSONResponse(status_code=422, content={"detail": _finite(jsonable_encoder(exc.errors()))})
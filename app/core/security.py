@@ -1,20 +1,39 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
 
+from fastapi import HTTPException, status
 from jose import jwt
 from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
 
-from app.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.core.config import (
+	SECRET_KEY,
+	ALGORITHM,
+	ACCESS_TOKEN_EXPIRE_MINUTES,
+	PASSWORD_HASH_ROUNDS,
+	PASSWORD_HASH_WORKERS,
+	PASSWORD_HASH_QUEUE_TIMEOUT,
+)
 
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+pwd_context = CryptContext(
+	schemes=["pbkdf2_sha256"],
+	deprecated="auto",
+	pbkdf2_sha256__default_rounds=PASSWORD_HASH_ROUNDS,
+	# Hashes with fewer rounds than configured count as outdated: verify_and_update re-hashes them
+	pbkdf2_sha256__min_rounds=PASSWORD_HASH_ROUNDS,
+)
 
 
-def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
+def create_access_token(subject: str, expires_delta: Optional[timedelta] = None, token_version: int = 0) -> str:
 	if expires_delta is None:
 		expires_delta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 	expire = datetime.now(timezone.utc) + expires_delta
-	to_encode = {"sub": subject, "exp": expire}
+	to_encode = {"sub": subject, "exp": expire, "ver": token_version}
 	encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 	return encoded_jwt
 
@@ -27,3 +46,73 @@ def get_password_hash(password: str) -> str:
 	return pwd_context.hash(password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+	"""(valid, new_hash); new_hash is set when the stored hash is valid but below the configured cost."""
+	return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasher:
+	"""
+	Runs password hashing on a dedicated, size-limited process pool.
+
+	pbkdf2 is deliberately slow, and on request threads a burst of logins
+	would take the threadpool (and the GIL) away from everything else. Here
+	at most ``workers`` hashes run at once, each in its own process; further
+	callers wait for a free worker for up to ``queue_timeout`` seconds and
+	then get a 503, so a login storm cannot build an unbounded backlog.
+	"""
+
+	def __init__(self, workers: int = PASSWORD_HASH_WORKERS, queue_timeout: float = PASSWORD_HASH_QUEUE_TIMEOUT):
+		self.workers = workers
+		self.queue_timeout = queue_timeout
+		self._executor: Optional[ProcessPoolExecutor] = None
+		self._slots: Optional[asyncio.Semaphore] = None
+		self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+	def _pool(self) -> ProcessPoolExecutor:
+		if self._executor is None:
+			self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+		return self._executor
+
+	def _free_slots(self) -> asyncio.Semaphore:
+		# A semaphore belongs to one event loop; tests and scripts may run several in turn
+		loop = asyncio.get_running_loop()
+		if self._loop is not loop:
+			self._slots = asyncio.Semaphore(self.workers)
+			self._loop = loop
+		return self._slots
+
+	async def _run(self, func, *args):
+		if self.workers <= 0:
+			return await run_in_threadpool(func, *args)
+		slots = self._free_slots()
+		try:
+			await asyncio.wait_for(slots.acquire(), self.queue_timeout)
+		except asyncio.TimeoutError:
+			raise HTTPException(
+				status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+				detail="Too many sign-ins in progress, please retry",
+				headers={"Retry-After": "1"},
+			)
+		try:
+			return await asyncio.get_running_loop().run_in_executor(self._pool(), func, *args)
+		except BrokenProcessPool:
+			# A worker died (e.g. killed by the OOM killer): start a fresh pool on the next call
+			self._executor = None
+			raise
+		finally:
+			slots.release()
+
+	async def hash(self, password: str) -> str:
+		return await self._run(get_password_hash, password)
+
+	async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+		return await self._run(verify_and_update_password, password, hashed_password)
+
+	def close(self) -> None:
+		if self._executor is not None:
+			self._executor.shutdown(wait=False, cancel_futures=True)
+			self._executor = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,77 @@
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import select
+
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+# Legacy storefront routes whose path does not match the seeded category name.
+SLUG_ALIASES = {
+	"earrings": "earings",
+	"wall-frames": "wall-frame",
+}
+
+
+def slugify(name: str) -> str:
+	"""'Ear Studs' -> 'ear-studs', 'Under 299' -> 'under-299'."""
+	return _NON_ALNUM.sub("-", name.lower()).strip("-")
+
+
+def unique_slug(name: str, taken) -> str:
+	"""
+	slugify(name) ('category' if nothing is left of it), suffixed -2, -3, ...
+	while it is in ``taken``: 'Rings!' next to 'Rings' gets 'rings-2'.
+	"""
+	base = slugify(name) or "category"
+	slug, suffix = base, 2
+	while slug in taken:
+		slug, suffix = f"{base}-{suffix}", suffix + 1
+	return slug
+
+
+def taken_slugs_sql(name: str) -> tuple:
+	"""(WHERE clause, params) selecting the slugs unique_slug() could collide with for ``name``."""
+	base = slugify(name) or "category"
+	# Slugs are [a-z0-9-] only, so the LIKE pattern has no wildcards of its own
+	return "slug = :base OR slug LIKE :pattern", {"base": base, "pattern": f"{base}-%"}
+
+
+class CategorySlugMap:
+	"""In-memory slug -> category_id map, loaded from the categories table on first use."""
+
+	# An unknown slug reloads the map at most this often, so random slugs cannot force a scan per request
+	MISS_REFRESH_SECONDS = 5.0
+
+	def __init__(self):
+		self._ids: Dict[str, int] = {}
+		self._loaded = False
+		self._refreshed_at = 0.0
+		self._lock = threading.Lock()
+
+	async def refresh(self, db) -> None:
+		from app.models import Category  # local import: app.models imports slugify from here
+
+		# Stamped before the query so concurrent misses do not all reload
+		self._refreshed_at = time.monotonic()
+		rows = await db.execute(select(Category.slug, Category.id))
+		ids = {slug: category_id for slug, category_id in rows if slug}
+		with self._lock:
+			self._ids = ids
+			self._loaded = True
+
+	async def resolve(self, db, slug: str) -> Optional[int]:
+		slug = slugify(slug)
+		if not self._loaded:
+			await self.refresh(db)
+		category_id = self._ids.get(slug) or self._ids.get(SLUG_ALIASES.get(slug, ""))
+		if category_id is None and time.monotonic() - self._refreshed_at >= self.MISS_REFRESH_SECONDS:
+			# The category may have been created by another worker since our last refresh
+			await self.refresh(db)
+			category_id = self._ids.get(slug) or self._ids.get(SLUG_ALIASES.get(slug, ""))
+		return category_id
+
+
+category_slugs = CategorySlugMap()
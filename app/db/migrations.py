@@ -0,0 +1,292 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
+
+from app.db.base import Base
+from app.core.slugs import unique_slug
+
+
+def ensure_supported_database(engine: Engine) -> None:
+	"""
+	Refuse anything but SQLite. Search, catalog ETags, category counters and
+	product_images are maintained by SQLite triggers (FTS5, json_each), which
+	no other database would get: it would serve zero counts and empty images.
+	"""
+	if engine.dialect.name != "sqlite":
+		raise RuntimeError(
+			f"Unsupported database {engine.dialect.name!r}: the catalog relies on SQLite triggers; set DATABASE_URL to a sqlite:/// URL"
+		)
+
+
+def _add_missing_columns(engine: Engine) -> None:
+	# create_all() never alters existing tables, so add columns introduced since.
+	# Only nullable columns or columns with a server default can be added this way.
+	inspector = inspect(engine)
+	existing_tables = set(inspector.get_table_names())
+	with engine.begin() as conn:
+		for table in Base.metadata.sorted_tables:
+			if table.name not in existing_tables:
+				continue
+			existing = {c["name"] for c in inspector.get_columns(table.name)}
+			for column in table.columns:
+				if column.name in existing:
+					continue
+				ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+				if column.server_default is not None:
+					ddl += f" DEFAULT {column.server_default.arg}"
+				conn.execute(text(ddl))
+
+
+def _backfill_category_slugs(engine: Engine) -> None:
+	# De-duplicated like new categories' slugs ('Rings!' next to 'Rings' gets 'rings-2'),
+	# or the unique index created next would fail; the oldest category keeps the plain slug
+	with engine.begin() as conn:
+		taken = set(conn.execute(text("SELECT slug FROM categories WHERE slug IS NOT NULL")).scalars())
+		rows = conn.execute(text("SELECT id, name FROM categories WHERE slug IS NULL ORDER BY id")).all()
+		for category_id, name in rows:
+			slug = unique_slug(name, taken)
+			taken.add(slug)
+			conn.execute(text("UPDATE categories SET slug = :slug WHERE id = :id"), {"slug": slug, "id": category_id})
+
+
+def _create_missing_indexes(engine: Engine) -> None:
+	# create_all() only emits indexes together with a new table; add the ones
+	# introduced after the table already existed in a deployed database.
+	# IF NOT EXISTS rather than checkfirst: reflection skips expression indexes.
+	with engine.begin() as conn:
+		for table in Base.metadata.sorted_tables:
+			for index in table.indexes:
+				conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+_PRODUCT_SEARCH_DDL = [
+	"""
+	CREATE VIRTUAL TABLE products_fts USING fts5(
+		name, full_name, description,
+		content='products', content_rowid='id',
+		tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+	)
+	""",
+	"""
+	CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+		INSERT INTO products_fts(rowid, name, full_name, description)
+		VALUES (new.id, new.name, new.full_name, new.description);
+	END
+	""",
+	"""
+	CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+		INSERT INTO products_fts(products_fts, rowid, name, full_name, description)
+		VALUES ('delete', old.id, old.name, old.full_name, old.description);
+	END
+	""",
+	"""
+	CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, full_name, description ON products BEGIN
+		INSERT INTO products_fts(products_fts, rowid, name, full_name, description)
+		VALUES ('delete', old.id, old.name, old.full_name, old.description);
+		INSERT INTO products_fts(rowid, name, full_name, description)
+		VALUES (new.id, new.name, new.full_name, new.description);
+	END
+	""",
+]
+
+
+def _create_product_search_index(engine: Engine) -> None:
+	# External-content FTS5 index over products, kept in sync by triggers so every
+	# write path (ORM, bulk statements, seed scripts) updates it.
+	with engine.begin() as conn:
+		exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'products_fts'")).first()
+		if exists:
+			return
+		for ddl in _PRODUCT_SEARCH_DDL:
+			conn.execute(text(ddl))
+		# Index the rows that existed before the triggers did
+		conn.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+
+
+def _create_catalog_version_triggers(engine: Engine) -> None:
+	# Bump the catalog version from the database itself, in the writer's own
+	# transaction, so ETags stay correct across workers and for every write path.
+	with engine.begin() as conn:
+		if conn.execute(text("SELECT 1 FROM catalog_version WHERE id = 1")).first() is None:
+			conn.execute(text("INSERT INTO catalog_version (id, version) VALUES (1, 0)"))
+		for table in ("products", "categories"):
+			for op in ("INSERT", "UPDATE", "DELETE"):
+				conn.execute(text(
+					f"CREATE TRIGGER IF NOT EXISTS {table}_catalog_version_{op.lower()} AFTER {op} ON {table} BEGIN "
+					"UPDATE catalog_version SET version = version + 1 WHERE id = 1; "
+					"END"
+				))
+
+
+_CATEGORY_COUNT_TRIGGERS = {
+	"products_category_count_ai": """
+	CREATE TRIGGER products_category_count_ai AFTER INSERT ON products BEGIN
+		UPDATE categories SET product_count = product_count + 1,
+			available_count = available_count + (new.status IS 'available')
+		WHERE id = new.category_id;
+	END
+	""",
+	"products_category_count_ad": """
+	CREATE TRIGGER products_category_count_ad AFTER DELETE ON products BEGIN
+		UPDATE categories SET product_count = product_count - 1,
+			available_count = available_count - (old.status IS 'available')
+		WHERE id = old.category_id;
+	END
+	""",
+	"products_category_count_au": """
+	CREATE TRIGGER products_category_count_au AFTER UPDATE OF category_id, status ON products
+	WHEN old.category_id IS NOT new.category_id OR old.status IS NOT new.status BEGIN
+		UPDATE categories SET product_count = product_count - 1,
+			available_count = available_count - (old.status IS 'available')
+		WHERE id = old.category_id;
+		UPDATE categories SET product_count = product_count + 1,
+			available_count = available_count + (new.status IS 'available')
+		WHERE id = new.category_id;
+	END
+	""",
+}
+
+_CATEGORY_COUNTS = {
+	"product_count": "SELECT count(*) FROM products WHERE products.category_id = categories.id",
+	"available_count": "SELECT count(*) FROM products WHERE products.category_id = categories.id AND products.status = 'available'",
+}
+# Each count is an index range scan on ix_products_category_id_created_at_id
+_RECONCILE_CATEGORY_COUNTS = (
+	"UPDATE categories SET "
+	+ ", ".join(f"{column} = ({query})" for column, query in _CATEGORY_COUNTS.items())
+	+ " WHERE "
+	+ " OR ".join(f"{column} <> ({query})" for column, query in _CATEGORY_COUNTS.items())
+)
+
+
+def reconcile_category_counts(engine: Engine) -> int:
+	"""Recount products per category and fix any drifted counters; returns how many categories changed."""
+	with engine.begin() as conn:
+		return conn.execute(text(_RECONCILE_CATEGORY_COUNTS)).rowcount
+
+
+def _install_triggers(engine: Engine, triggers: dict, backfill: list) -> None:
+	"""
+	Create the missing SQLite ``triggers`` ({name: ddl}); if any were missing, run ``backfill`` in the same transaction.
+
+	A trigger whose definition has changed since it was installed is recreated
+	(SQLite keeps the CREATE statement as written), without a backfill.
+	"""
+	with engine.begin() as conn:
+		existing = dict(conn.execute(text("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'")).all())
+		missing = [ddl for name, ddl in triggers.items() if name not in existing]
+		for name, ddl in triggers.items():
+			if name in existing and existing[name].strip() != ddl.strip():
+				conn.execute(text(f"DROP TRIGGER {name}"))
+				conn.execute(text(ddl))
+		for ddl in missing:
+			conn.execute(text(ddl))
+		if missing:
+			for statement in backfill:
+				conn.execute(text(statement))
+
+
+def _create_category_count_triggers(engine: Engine) -> None:
+	# Keep categories.product_count/available_count in step with every write to
+	# products (ORM, bulk import/patch, stock reservation) in the writer's transaction.
+	# Counters are only maintained from then on, so count what is already there.
+	_install_triggers(engine, _CATEGORY_COUNT_TRIGGERS, [_RECONCILE_CATEGORY_COUNTS])
+
+
+def _image_rows(product_id: str, images: str, source: str = "") -> str:
+	"""
+	SELECT producing product_images rows from an images JSON value (a bare URL,
+	or a single {"url": ...} object, counts as one image). ``source`` joins in a
+	table to convert many products at once.
+	"""
+	field = "CASE WHEN img.type = 'object' THEN json_extract(img.value, '$.{}') END"
+	url = "CASE WHEN img.type = 'object' THEN json_extract(img.value, '$.url') ELSE img.value END"
+	return f"""
+	SELECT {product_id}, coalesce(CAST(img.key AS INTEGER), 0), {url},
+		{field.format("width")}, {field.format("height")}, {field.format("alt")}
+	FROM {source + ", " if source else ""}json_each(CASE
+		WHEN NOT json_valid({images}) THEN json_array({images})
+		WHEN json_type({images}) = 'array' THEN {images}
+		ELSE json_array(json({images}))
+	END) AS img
+	WHERE {images} IS NOT NULL AND img.type IN ('text', 'object') AND coalesce({url}, '') <> ''
+	"""
+
+
+_IMAGE_COLUMNS = "product_images (product_id, position, url, width, height, alt)"
+
+_PRODUCT_IMAGE_TRIGGERS = {
+	"products_images_ai": f"""
+	CREATE TRIGGER products_images_ai AFTER INSERT ON products WHEN new.images IS NOT NULL BEGIN
+		INSERT INTO {_IMAGE_COLUMNS} {_image_rows("new.id", "new.images")};
+	END
+	""",
+	"products_images_au": f"""
+	CREATE TRIGGER products_images_au AFTER UPDATE OF images ON products
+	WHEN old.images IS NOT new.images BEGIN
+		DELETE FROM product_images WHERE product_id = new.id;
+		INSERT INTO {_IMAGE_COLUMNS} {_image_rows("new.id", "new.images")};
+	END
+	""",
+	"products_images_ad": """
+	CREATE TRIGGER products_images_ad AFTER DELETE ON products BEGIN
+		DELETE FROM product_images WHERE product_id = old.id;
+	END
+	""",
+}
+
+
+def _create_product_image_triggers(engine: Engine) -> None:
+	# product_images is the normalized form of products.images. Triggers keep it in
+	# step with every write path, which can all keep sending the JSON list.
+	# The JSON of products stored before the triggers existed is converted once.
+	_install_triggers(engine, _PRODUCT_IMAGE_TRIGGERS, [
+		"DELETE FROM product_images",
+		f"INSERT INTO {_IMAGE_COLUMNS} {_image_rows('products.id', 'products.images', 'products')}",
+	])
+
+
+_IMAGE_JOB_TRIGGERS = {
+	"product_images_queue_ai": """
+	CREATE TRIGGER product_images_queue_ai AFTER INSERT ON product_images BEGIN
+		INSERT OR IGNORE INTO image_jobs (source) VALUES (new.url);
+	END
+	""",
+}
+
+
+def _create_image_job_triggers(engine: Engine) -> None:
+	# Queue variant generation for every new image URL, whichever path added it;
+	# the image worker picks the jobs up. Images that already exist are queued once.
+	_install_triggers(engine, _IMAGE_JOB_TRIGGERS, [
+		"INSERT OR IGNORE INTO image_jobs (source) SELECT DISTINCT url FROM product_images",
+	])
+
+
+def _backfill_sales_rollups(engine: Engine) -> None:
+	# Rollups are only added to by each new order, so orders that were already there
+	# (placed before the rollup tables existed, or seeded) are aggregated once, while
+	# the rollups are still empty. Any order with items gives sales_daily a row.
+	with engine.connect() as conn:
+		empty = conn.execute(text("SELECT 1 FROM sales_daily LIMIT 1")).first() is None
+		if not empty or conn.execute(text("SELECT 1 FROM order_items LIMIT 1")).first() is None:
+			return
+	from app.core.analytics import rebuild_sales_rollups  # local import: it imports app.db.session, which imports this module
+	rebuild_sales_rollups(engine)
+
+
+def upgrade(engine: Engine) -> None:
+	"""Bring an existing database up to date with the current models (idempotent)."""
+	ensure_supported_database(engine)
+	inspector = inspect(engine)
+	if not inspector.get_table_names():
+		return
+	_add_missing_columns(engine)
+	_backfill_category_slugs(engine)
+	_create_missing_indexes(engine)
+	_create_product_search_index(engine)
+	_create_catalog_version_triggers(engine)
+	_create_category_count_triggers(engine)
+	_create_product_image_triggers(engine)
+	_create_image_job_triggers(engine)
+	_backfill_sales_rollups(engine)
@@ -0,0 +1,74 @@
+"""
+Per-request SQL accounting, fed by cursor-execute hooks on the engines.
+
+QueryStatsMiddleware puts a QueryStats in a context variable for each request;
+the hooks add every statement run while handling it (on the request's task,
+its SQLAlchemy greenlets and any threadpool call, which all inherit the
+context). Outside a request (scripts, the image worker) only the slow-query
+log applies.
+"""
+import logging
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import SLOW_QUERY_MS, N_PLUS_ONE_THRESHOLD
+
+
+logger = logging.getLogger(__name__)
+
+MAX_LOGGED_PARAMETERS = 1000  # characters of repr(parameters) in the slow-query log
+
+
+class QueryStats:
+	__slots__ = ("count", "seconds", "statements")
+
+	def __init__(self):
+		self.count = 0
+		self.seconds = 0.0
+		# Executions per statement text: same text, different parameters = same shape
+		self.statements: Dict[str, int] = {}
+
+	def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+		"""Statements executed at least ``threshold`` times: probable N+1 loads."""
+		if threshold <= 0:
+			return []
+		return [(statement, count) for statement, count in self.statements.items() if count >= threshold]
+
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def instrument_engine(target: Engine, slow_query_ms: float = SLOW_QUERY_MS) -> None:
+	"""Attribute every statement ``target`` runs to the current request, and log slow ones."""
+
+	@event.listens_for(target, "before_cursor_execute")
+	def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+		conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+	@event.listens_for(target, "after_cursor_execute")
+	def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+		elapsed = time.perf_counter() - conn.info["query_started"].pop()
+		stats = current_query_stats.get()
+		if stats is not None:
+			stats.count += 1
+			stats.seconds += elapsed
+			stats.statements[statement] = stats.statements.get(statement, 0) + 1
+		if slow_query_ms > 0 and elapsed * 1000 >= slow_query_ms:
+			logger.warning(
+				"Slow query (%.1f ms): %s; parameters: %s",
+				elapsed * 1000,
+				statement,
+				repr(parameters)[:MAX_LOGGED_PARAMETERS],
+			)
+
+	@event.listens_for(target, "handle_error")
+	def _handle_error(exception_context):
+		# after_cursor_execute does not run for a failed statement; drop its start time
+		connection = exception_context.connection
+		started = connection.info.get("query_started") if connection is not None else None
+		if started:
+			started.pop()
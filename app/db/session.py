@@ -1,19 +1,94 @@
-from sqlalchemy import create_engine
+import asyncio
+import itertools
+import random
+import sqlite3
+import time
+from typing import Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-from app.core.config import DATABASE_URL
+from app.core.config import (
+	DATABASE_URL,
+	ASYNC_DATABASE_URL,
+	SQLITE_JOURNAL_MODE,
+	SQLITE_SYNCHRONOUS,
+	SQLITE_CACHE_SIZE,
+	SQLITE_MMAP_SIZE,
+	SQLITE_BUSY_TIMEOUT_MS,
+	SQLITE_TEMP_STORE,
+	DB_POOL_SIZE,
+	DB_MAX_OVERFLOW,
+	DB_POOL_TIMEOUT,
+	DB_POOL_RECYCLE,
+)
 from app.db.base import Base  # Ensures models are imported
+from app.db.migrations import ensure_supported_database, upgrade
+from app.db.query_stats import instrument_engine
 
 
 is_sqlite = DATABASE_URL.startswith("sqlite")
+is_memory = is_sqlite and (":memory:" in DATABASE_URL or DATABASE_URL.rstrip("/") == "sqlite:")
 
-engine = create_engine(
-	DATABASE_URL,
-	connect_args={"check_same_thread": False} if is_sqlite else {},
-)
+# Order matters: busy_timeout first so the journal_mode switch can wait on a lock held by another worker
+SQLITE_PRAGMAS = {
+	"busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+	"journal_mode": SQLITE_JOURNAL_MODE,
+	"synchronous": SQLITE_SYNCHRONOUS,
+	"cache_size": SQLITE_CACHE_SIZE,
+	"mmap_size": SQLITE_MMAP_SIZE,
+	"temp_store": SQLITE_TEMP_STORE,
+}
+
+
+def apply_sqlite_profile(target: Engine, pragmas: Optional[dict] = None) -> None:
+	"""Run ``pragmas`` (default ``SQLITE_PRAGMAS``) on every new DBAPI connection opened by ``target``."""
+	pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+
+	@event.listens_for(target, "connect")
+	def _set_sqlite_pragmas(dbapi_connection, connection_record):
+		cursor = dbapi_connection.cursor()
+		for name, value in pragmas.items():
+			if value != "":
+				cursor.execute(f"PRAGMA {name}={value}")
+		cursor.close()
+
+
+def _engine_options() -> dict:
+	options = {"connect_args": {"check_same_thread": False} if is_sqlite else {}}
+	if not is_memory:
+		options.update(
+			pool_size=DB_POOL_SIZE,
+			max_overflow=DB_MAX_OVERFLOW,
+			pool_timeout=DB_POOL_TIMEOUT,
+			pool_recycle=DB_POOL_RECYCLE,
+		)
+	return options
+
+
+engine = create_engine(DATABASE_URL, **_engine_options())
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async stack for the catalog and order endpoints. Requests then wait on the
+# event loop instead of holding one of Starlette's threadpool slots during I/O.
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_options())
+
+# expire_on_commit=False: objects are serialized after commit, and an expired
+# attribute cannot be lazy-loaded outside the session's greenlet.
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+if is_sqlite:
+	apply_sqlite_profile(engine)
+	apply_sqlite_profile(async_engine.sync_engine)
+
+# Per-request query counts/time, slow-query log, N+1 detection (see app/db/query_stats.py)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
 
 def get_db():
 	db = SessionLocal()
@@ -23,8 +98,66 @@ def get_db():
 		db.close()
 
 
+async def get_async_db():
+	async with AsyncSessionLocal() as db:
+		yield db
+
+
+# Pacing of BEGIN IMMEDIATE retries while another connection holds the write lock
+_BEGIN_RETRY_DELAYS = (0.001, 0.002, 0.005, 0.01)
+# How long to keep retrying when the connection has no busy_timeout of its own (SQLITE_BUSY_TIMEOUT_MS="")
+_BEGIN_DEFAULT_TIMEOUT_MS = 5000
+
+
+async def begin_immediate(db: AsyncSession) -> None:
+	"""
+	Open the session's transaction holding SQLite's write lock (BEGIN IMMEDIATE).
+
+	Use it for read-then-write transactions such as checkout: a deferred
+	transaction that reads first can fail with SQLITE_BUSY when another writer
+	commits in between, whereas waiting for the lock up front cannot. Must be
+	the session's first statement; a no-op on other databases.
+
+	The lock is requested with busy_timeout off and retried with short sleeps on
+	the event loop for as long as the connection's busy_timeout (5s if it has
+	none), which is then put back as it was. SQLite's own busy handler
+	would block the driver thread and poll every 100ms once it has waited a
+	while, so under contention waiting writers kept missing the moment the
+	lock was free and checkout latency climbed into seconds.
+	"""
+	if not is_sqlite:
+		return
+	connection = await db.connection()
+	# The aiosqlite connection itself: polling through SQLAlchemy's execute and
+	# error wrapping costs enough loop time to slow down the lock holder
+	driver = (await connection.get_raw_connection()).driver_connection
+	async with driver.execute("PRAGMA busy_timeout") as cursor:
+		(busy_timeout,) = await cursor.fetchone()
+	deadline = time.monotonic() + (busy_timeout or _BEGIN_DEFAULT_TIMEOUT_MS) / 1000
+	await _execute(driver, "PRAGMA busy_timeout=0")
+	try:
+		for attempt in itertools.count():
+			try:
+				await _execute(driver, "BEGIN IMMEDIATE")
+				return
+			except sqlite3.OperationalError as exc:
+				if "database is locked" not in str(exc) or time.monotonic() >= deadline:
+					raise OperationalError("BEGIN IMMEDIATE", None, exc) from exc
+			delay = _BEGIN_RETRY_DELAYS[min(attempt, len(_BEGIN_RETRY_DELAYS) - 1)]
+			# Jitter keeps waiters from retrying in lockstep
+			await asyncio.sleep(random.uniform(delay / 2, delay))
+	finally:
+		await _execute(driver, f"PRAGMA busy_timeout={int(busy_timeout)}")
+
+
+async def _execute(driver, sql: str) -> None:
+	async with driver.execute(sql):
+		pass
+
+
 def init_db() -> None:
+	# Before create_all, so an unsupported database is left untouched
+	ensure_supported_database(engine)
 	# Importing Base via app.db.base ensures all models are registered
 	Base.metadata.create_all(bind=engine)
-
-
+	upgrade(engine)
@@ -1,8 +1,15 @@
+import time
+from typing import NamedTuple
+
 from fastapi import Header, HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from sqlalchemy import select
 
+from app.core.cache import token_cache
 from app.core.config import SECRET_KEY, ALGORITHM
+from app.db.session import AsyncSessionLocal
+from app.models import User
 
 
 def get_current_role(x_role: str | None = Header(None)) -> str:
@@ -19,18 +26,60 @@ def require_admin(role: str = Depends(get_current_role)) -> None:
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
-def get_current_user_id(token: str = Depends(oauth2_scheme)) -> int:
+class CurrentUser(NamedTuple):
+	id: int
+	is_admin: bool
+	exp: float  # token expiry, unix time
+
+
+def _invalid_token() -> HTTPException:
+	return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+
+async def _verify_token(token: str) -> CurrentUser:
 	try:
 		payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
 		user_id = int(payload.get("sub"))
-		return user_id
-	except (JWTError, ValueError, TypeError):
-		raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+		exp = float(payload["exp"])
+		version = int(payload.get("ver", 0))
+	except (JWTError, KeyError, ValueError, TypeError):
+		raise _invalid_token()
+	async with AsyncSessionLocal() as db:
+		user = (await db.execute(
+			select(User.is_active, User.is_admin, User.token_version).where(User.id == user_id)
+		)).first()
+	# Deactivated users and tokens issued before a password reset are rejected
+	if user is None or not user.is_active or user.token_version != version:
+		raise _invalid_token()
+	return CurrentUser(id=user_id, is_admin=bool(user.is_admin), exp=exp)
+
 
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> CurrentUser:
+	"""
+	The user behind the bearer token.
 
-def require_admin_or_header(role: str = Depends(get_current_role), user_id: int = Depends(get_current_user_id)) -> None:
-	# Accept either admin header or a valid token; extend to check DB for is_admin if needed
-	if role == "admin":
-		return
-	return
+	The first request with a token verifies its signature and loads the user;
+	the result is kept in token_cache until the token expires (or the cache TTL
+	runs out), so repeat requests cost a dict lookup.
+	"""
+	user = token_cache.get(token)
+	if user is not None and user.exp > time.time():
+		return user
+	user = await _verify_token(token)
+	token_cache.set(token, user, ttl=user.exp - time.time())
+	return user
 
+
+def forget_user_tokens(user_id: int) -> int:
+	"""Drop a user's cached tokens; call after anything that revokes them (password reset, deactivation)."""
+	return token_cache.pop_where(lambda user: user.id == user_id)
+
+
+def get_current_user_id(user: CurrentUser = Depends(get_current_user)) -> int:
+	return user.id
+
+
+def require_admin_or_header(role: str = Depends(get_current_role), user: CurrentUser = Depends(get_current_user)) -> None:
+	# Accept either the admin header or a token belonging to an admin user
+	if role != "admin" and not user.is_admin:
+		raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
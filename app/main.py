@@ -1,7 +1,54 @@
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.exceptions import RequestValidationError
+from fastapi.staticfiles import StaticFiles
+
 from app.db.session import init_db
 from app.api.v1.api import api_router
+from app.core.config import (
+	MEDIA_ROOT,
+	MEDIA_URL,
+	IMAGE_WORKERS,
+	RATE_LIMIT_ENABLED,
+	METRICS_ENABLED,
+	SERVER_TIMING_ENABLED,
+	DEBUG,
+)
+from app.core.image_jobs import ImageWorker
+from app.core.responses import validation_error_handler
+from app.core.security import password_hasher
+from app.middleware.metrics import MetricsMiddleware, metrics_endpoint
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+	# Image variants are rendered off the request path, in a process pool (IMAGE_WORKERS=0 disables it)
+	worker = ImageWorker() if IMAGE_WORKERS > 0 else None
+	if worker:
+		await worker.start()
+	try:
+		yield
+	finally:
+		if worker:
+			await worker.stop()
+		password_hasher.close()
+
 
 init_db()
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.add_exception_handler(RequestValidationError, validation_error_handler)
+app.add_middleware(QueryStatsMiddleware, debug_headers=DEBUG)
+if RATE_LIMIT_ENABLED:
+	app.add_middleware(RateLimitMiddleware)
+# Added last so it is outermost: rate-limited requests are counted too
+if METRICS_ENABLED:
+	app.add_middleware(MetricsMiddleware, server_timing=SERVER_TIMING_ENABLED)
+	app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
 app.include_router(api_router)
+# Rendered variants; in production the reverse proxy can serve MEDIA_ROOT directly
+os.makedirs(MEDIA_ROOT, exist_ok=True)
+app.mount(MEDIA_URL, StaticFiles(directory=MEDIA_ROOT), name="media")
@@ -0,0 +1,159 @@
+"""
+Request metrics per route template, exposed in the Prometheus text format.
+
+Routes are labelled with their template (/api/v1/products/{product_id}), never
+the raw path, and unknown methods as OTHER, so the number of series stays
+bounded by the number of routes.
+Recording a request is a few dict lookups and bisects on the event loop; the
+text is only rendered when /metrics is scraped. Metrics are per process: with
+several uvicorn workers, scrape each one (or sum them in the query).
+"""
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+UNMATCHED = "<unmatched>"
+# Any other method (clients can send arbitrary tokens) is labelled OTHER
+METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE", "CONNECT"})
+
+
+class Histogram:
+	__slots__ = ("bounds", "counts", "total", "count")
+
+	def __init__(self, bounds: Tuple[float, ...]):
+		self.bounds = bounds
+		self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+		self.total = 0.0
+		self.count = 0
+
+	def observe(self, value: float) -> None:
+		self.counts[bisect_left(self.bounds, value)] += 1
+		self.total += value
+		self.count += 1
+
+	def render(self, name: str, labels: str, lines: List[str]) -> None:
+		cumulative = 0
+		for bound, count in zip(self.bounds, self.counts):
+			cumulative += count
+			lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+		lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+		lines.append(f"{name}_sum{{{labels}}} {self.total}")
+		lines.append(f"{name}_count{{{labels}}} {self.count}")
+
+
+class Metrics:
+	def __init__(self):
+		self.requests: Dict[Tuple[str, str, int], int] = {}
+		self.latency: Dict[Tuple[str, str], Histogram] = {}
+		self.response_size: Dict[Tuple[str, str], Histogram] = {}
+		self.in_flight: Dict[str, int] = {}
+
+	def record(self, method: str, route: str, status: int, seconds: float, size: int) -> None:
+		key = (method, route, status)
+		self.requests[key] = self.requests.get(key, 0) + 1
+		series = (method, route)
+		latency = self.latency.get(series)
+		if latency is None:
+			latency = self.latency[series] = Histogram(LATENCY_BUCKETS)
+			self.response_size[series] = Histogram(SIZE_BUCKETS)
+		latency.observe(seconds)
+		self.response_size[series].observe(size)
+
+	def render(self) -> str:
+		lines = [
+			"# HELP http_requests_total Requests handled, by route template and status.",
+			"# TYPE http_requests_total counter",
+		]
+		for (method, route, status), count in sorted(self.requests.items()):
+			lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}')
+		lines += [
+			"# HELP http_requests_in_progress Requests being handled (not yet routed, so per method).",
+			"# TYPE http_requests_in_progress gauge",
+		]
+		for method, count in sorted(self.in_flight.items()):
+			lines.append(f'http_requests_in_progress{{method="{method}"}} {count}')
+		for name, kind, help_text, series in (
+			("http_request_duration_seconds", "histogram", "Time to the last response byte.", self.latency),
+			("http_response_size_bytes", "histogram", "Response body size.", self.response_size),
+		):
+			lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+			for (method, route), histogram in sorted(series.items()):
+				histogram.render(name, f'method="{method}",route="{_escape(route)}"', lines)
+		return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+	return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def route_template(scope, root_path: str = "") -> str:
+	"""
+	The matched route's template, with the prefixes of the routers it was included under.
+
+	A route only knows its own template (/products/{product_id}), so the prefix
+	is whatever precedes that template, filled in with the path parameters, in
+	the request path. Mounted apps (StaticFiles) report their mount path.
+	"""
+	route = scope.get("route")
+	if route is None:
+		mount = scope.get("root_path", "")
+		return f"{mount[len(root_path):]}/{{path}}" if len(mount) > len(root_path) else UNMATCHED
+	template = getattr(route, "path_format", None) or getattr(route, "path", None) or UNMATCHED
+	try:
+		concrete = template.format(**scope.get("path_params", {}))
+	except (KeyError, IndexError, ValueError):
+		return template
+	path = scope["path"]
+	return path[: len(path) - len(concrete)] + template if path.endswith(concrete) else template
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+	"""Records every HTTP request in ``metrics`` and adds a Server-Timing header with the app time."""
+
+	def __init__(self, app, registry: Metrics = metrics, server_timing: bool = True):
+		self.app = app
+		self.registry = registry
+		self.server_timing = server_timing
+
+	async def __call__(self, scope, receive, send):
+		if scope["type"] != "http":
+			return await self.app(scope, receive, send)
+		method = scope["method"] if scope["method"] in METHODS else "OTHER"
+		root_path = scope.get("root_path", "")
+		started = time.perf_counter()
+		status = 500
+		size = 0
+		in_flight = self.registry.in_flight
+		in_flight[method] = in_flight.get(method, 0) + 1
+
+		async def send_wrapper(message):
+			nonlocal status, size
+			if message["type"] == "http.response.start":
+				status = message["status"]
+				if self.server_timing:
+					duration = (time.perf_counter() - started) * 1000
+					headers = list(message.get("headers", ()))
+					headers.append((b"server-timing", f"app;dur={duration:.1f}".encode()))
+					message = {**message, "headers": headers}
+			elif message["type"] == "http.response.body":
+				size += len(message.get("body", b""))
+			await send(message)
+
+		try:
+			await self.app(scope, receive, send_wrapper)
+		finally:
+			in_flight[method] -= 1
+			self.registry.record(method, route_template(scope, root_path), status, time.perf_counter() - started, size)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+	return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
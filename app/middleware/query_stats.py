@@ -0,0 +1,52 @@
+"""
+Per-request SQL totals: probable N+1 loads are logged, and in debug mode the
+query count and DB time go into the response headers.
+"""
+import logging
+
+from app.core.config import N_PLUS_ONE_THRESHOLD
+from app.db.query_stats import QueryStats, current_query_stats
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatsMiddleware:
+	def __init__(self, app, debug_headers: bool = False, n_plus_one_threshold: int = N_PLUS_ONE_THRESHOLD):
+		self.app = app
+		self.debug_headers = debug_headers
+		self.n_plus_one_threshold = n_plus_one_threshold
+
+	async def __call__(self, scope, receive, send):
+		if scope["type"] != "http":
+			return await self.app(scope, receive, send)
+		stats = QueryStats()
+		token = current_query_stats.set(stats)
+
+		async def send_wrapper(message):
+			if self.debug_headers and message["type"] == "http.response.start":
+				# Totals as of the first response byte; a streamed body may query after this
+				headers = list(message.get("headers", ()))
+				headers += [
+					(b"x-db-query-count", str(stats.count).encode()),
+					(b"x-db-time-ms", f"{stats.seconds * 1000:.1f}".encode()),
+					(b"server-timing", f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"'.encode()),
+				]
+				repeated = stats.repeated(self.n_plus_one_threshold)
+				if repeated:
+					headers.append((b"x-db-repeated-statements", str(len(repeated)).encode()))
+				message = {**message, "headers": headers}
+			await send(message)
+
+		try:
+			await self.app(scope, receive, send_wrapper)
+		finally:
+			current_query_stats.reset(token)
+			for statement, count in stats.repeated(self.n_plus_one_threshold):
+				logger.warning(
+					"Probable N+1 in %s %s: statement ran %d times: %s",
+					scope["method"],
+					scope["path"],
+					count,
+					" ".join(statement.split()),
+				)
@@ -0,0 +1,217 @@
+"""
+Token-bucket rate limiting, as plain ASGI middleware.
+
+Each request is classified by path into a route class (catalog, auth, orders)
+and charged one token from the bucket of (class, client). The client is the
+user behind a bearer token when that token has already been verified (it is in
+token_cache), otherwise the client IP, so forged tokens cannot buy fresh
+buckets. An empty bucket answers 429 with Retry-After.
+"""
+import asyncio
+import logging
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional, Tuple
+
+from app.core.cache import token_cache
+from app.core.config import (
+	RATE_LIMIT_CATALOG,
+	RATE_LIMIT_AUTH,
+	RATE_LIMIT_ORDERS,
+	RATE_LIMIT_SQLITE_PATH,
+	RATE_LIMIT_MAX_CLIENTS,
+	RATE_LIMIT_TRUSTED_PROXIES,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class RatePolicy(NamedTuple):
+	name: str
+	capacity: float  # bucket size, i.e. the burst allowed
+	rate: float  # tokens added per second
+
+
+def parse_policy(name: str, spec: str) -> Optional[RatePolicy]:
+	"""'<requests>/<seconds>' -> RatePolicy; an empty spec means no limit."""
+	if not spec.strip():
+		return None
+	requests, _, seconds = spec.partition("/")
+	return RatePolicy(name, float(requests), float(requests) / float(seconds or 1))
+
+
+# Path prefix -> route class; the first match wins, so specific prefixes come first
+ROUTE_CLASSES = (
+	("/api/v1/auth/login", "auth"),
+	("/api/v1/auth/signup", "auth"),
+	("/api/v1/auth/forgot-password", "auth"),
+	("/api/v1/auth/reset-password", "auth"),
+	("/api/v1/orders", "orders"),
+	("/api/v1/products", "catalog"),
+	("/api/v1/categories", "catalog"),
+)
+
+DEFAULT_POLICIES = {
+	name: policy
+	for name, policy in (
+		("catalog", parse_policy("catalog", RATE_LIMIT_CATALOG)),
+		("auth", parse_policy("auth", RATE_LIMIT_AUTH)),
+		("orders", parse_policy("orders", RATE_LIMIT_ORDERS)),
+	)
+	if policy is not None
+}
+
+
+class MemoryBucketStore:
+	"""Buckets in process memory: a dict update per request, bounded by LRU eviction."""
+
+	def __init__(self, max_clients: int = RATE_LIMIT_MAX_CLIENTS):
+		self.max_clients = max_clients
+		self._buckets: "OrderedDict[str, list]" = OrderedDict()
+		self._lock = threading.Lock()
+
+	def hit(self, key: str, policy: RatePolicy, now: float) -> Tuple[bool, float]:
+		"""Take one token; returns (allowed, seconds until a token is available)."""
+		with self._lock:
+			bucket = self._buckets.get(key)
+			if bucket is None:
+				bucket = self._buckets[key] = [policy.capacity, now]
+				if len(self._buckets) > self.max_clients:
+					# Evicting forgets a client's debt, which only ever errs towards allowing
+					self._buckets.popitem(last=False)
+			else:
+				self._buckets.move_to_end(key)
+			tokens = min(policy.capacity, bucket[0] + (now - bucket[1]) * policy.rate)
+			bucket[1] = now
+			if tokens >= 1:
+				bucket[0] = tokens - 1
+				return True, 0.0
+			bucket[0] = tokens
+			return False, (1 - tokens) / policy.rate
+
+	async def take(self, key: str, policy: RatePolicy, now: float) -> Tuple[bool, float]:
+		return self.hit(key, policy, now)
+
+
+class SQLiteBucketStore:
+	"""
+	Buckets in a SQLite file, shared by every worker process that opens it.
+
+	Taking a token is a single UPSERT that only writes when a token is
+	available, so concurrent workers cannot both spend the last one. It runs
+	on a dedicated thread, never the event loop, and waits at most
+	BUSY_TIMEOUT_MS for another worker's write: past that, or on any other
+	database error, the request is let through (fail open).
+	"""
+
+	_TAKE = """
+		INSERT INTO rate_buckets (key, tokens, updated) VALUES (:key, :capacity - 1, :now)
+		ON CONFLICT (key) DO UPDATE SET
+			tokens = min(:capacity, tokens + (:now - updated) * :rate) - 1,
+			updated = :now
+		WHERE min(:capacity, tokens + (:now - updated) * :rate) >= 1
+		RETURNING tokens
+	"""
+	PRUNE_EVERY = 10000
+	BUSY_TIMEOUT_MS = 5
+
+	def __init__(self, path: str):
+		self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+		self._conn.execute("PRAGMA journal_mode=WAL")
+		# Limiter state is disposable: never wait for fsync
+		self._conn.execute("PRAGMA synchronous=OFF")
+		self._conn.execute(f"PRAGMA busy_timeout={self.BUSY_TIMEOUT_MS}")
+		self._conn.execute(
+			"CREATE TABLE IF NOT EXISTS rate_buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL) WITHOUT ROWID"
+		)
+		self._lock = threading.Lock()
+		self._hits = 0
+		# One thread: statements are serialized on the connection anyway
+		self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rate-limit")
+
+	def hit(self, key: str, policy: RatePolicy, now: float) -> Tuple[bool, float]:
+		# time.time(), not monotonic: the clock is shared between processes
+		params = {"key": key, "capacity": policy.capacity, "rate": policy.rate, "now": now}
+		try:
+			with self._lock:
+				self._hits += 1
+				if self._hits % self.PRUNE_EVERY == 0:
+					# A bucket idle for an hour is full again whatever it held; drop it
+					self._conn.execute("DELETE FROM rate_buckets WHERE updated < ?", (now - 3600,))
+				if self._conn.execute(self._TAKE, params).fetchone() is not None:
+					return True, 0.0
+				row = self._conn.execute("SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+		except sqlite3.Error as exc:
+			logger.warning("Rate limit store unavailable, allowing request: %s", exc)
+			return True, 0.0
+		tokens = min(policy.capacity, row[0] + (now - row[1]) * policy.rate) if row else policy.capacity
+		return False, max(1 - tokens, 0.0) / policy.rate
+
+	async def take(self, key: str, policy: RatePolicy, now: float) -> Tuple[bool, float]:
+		return await asyncio.get_running_loop().run_in_executor(self._executor, self.hit, key, policy, now)
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+	for key, value in scope["headers"]:
+		if key == name:
+			return value.decode("latin-1")
+	return None
+
+
+class RateLimitMiddleware:
+	def __init__(self, app, policies: Optional[dict] = None, store=None, trusted_proxies: int = RATE_LIMIT_TRUSTED_PROXIES):
+		self.app = app
+		self.policies = DEFAULT_POLICIES if policies is None else policies
+		if store is None:
+			store = SQLiteBucketStore(RATE_LIMIT_SQLITE_PATH) if RATE_LIMIT_SQLITE_PATH else MemoryBucketStore()
+		self.store = store
+		self.trusted_proxies = trusted_proxies
+		self.clock = time.time if isinstance(store, SQLiteBucketStore) else time.monotonic
+
+	def _policy(self, path: str) -> Optional[RatePolicy]:
+		for prefix, name in ROUTE_CLASSES:
+			if path.startswith(prefix):
+				return self.policies.get(name)
+		return None
+
+	def _client(self, scope) -> str:
+		authorization = _header(scope, b"authorization")
+		if authorization and authorization[:7].lower() == "bearer ":
+			user = token_cache.get(authorization[7:])
+			if user is not None:
+				return f"user:{user.id}"
+		if self.trusted_proxies:
+			forwarded = _header(scope, b"x-forwarded-for")
+			hops = [hop.strip() for hop in forwarded.split(",")] if forwarded else []
+			# Each trusted proxy appends the address it saw, so count from the right:
+			# everything further left was written by the client and proves nothing
+			if len(hops) >= self.trusted_proxies:
+				return f"ip:{hops[-self.trusted_proxies]}"
+		client = scope.get("client")
+		return f"ip:{client[0] if client else 'unknown'}"
+
+	async def __call__(self, scope, receive, send):
+		if scope["type"] != "http":
+			return await self.app(scope, receive, send)
+		policy = self._policy(scope["path"])
+		if policy is None:
+			return await self.app(scope, receive, send)
+		allowed, retry_after = await self.store.take(f"{policy.name}:{self._client(scope)}", policy, self.clock())
+		if allowed:
+			return await self.app(scope, receive, send)
+		body = b'{"detail":"Too many requests"}'
+		await send({
+			"type": "http.response.start",
+			"status": 429,
+			"headers": [
+				(b"content-type", b"application/json"),
+				(b"content-length", str(len(body)).encode()),
+				(b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+			],
+		})
+		await send({"type": "http.response.body", "body": body})
@@ -1,4 +1,7 @@
 from .category import Category
-from .model import Product
+from .model import Product, ProductImage, ImageJob
 from .user import User
-from .order import Order, OrderItem
\ No newline at end of file
+from .order import Order, OrderItem
+from .catalog import CatalogVersion
+from .idempotency import IdempotencyKey
+from .analytics import SalesDaily, ProductSalesDaily, CategorySalesDaily
\ No newline at end of file
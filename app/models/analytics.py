@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, Float, Date
+
+from app.db.base_class import Base
+
+
+class _DailySales:
+	"""Columns shared by the daily rollups, maintained by app.core.analytics."""
+	revenue = Column(Float, nullable=False, default=0)
+	units = Column(Integer, nullable=False, default=0)
+	orders = Column(Integer, nullable=False, default=0)
+
+
+class SalesDaily(_DailySales, Base):
+	__tablename__ = "sales_daily"
+	day = Column(Date, primary_key=True)
+
+
+class ProductSalesDaily(_DailySales, Base):
+	__tablename__ = "product_sales_daily"
+	day = Column(Date, primary_key=True)
+	# Not a foreign key: rollups outlive deleted products
+	product_id = Column(Integer, primary_key=True, index=True)
+
+
+class CategorySalesDaily(_DailySales, Base):
+	__tablename__ = "category_sales_daily"
+	day = Column(Date, primary_key=True)
+	category_id = Column(Integer, primary_key=True, index=True)
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer
+
+from app.db.base_class import Base
+
+
+class CatalogVersion(Base):
+	"""Single-row counter bumped (by triggers) on every product or category write."""
+	__tablename__ = "catalog_version"
+	id = Column(Integer, primary_key=True)
+	version = Column(Integer, nullable=False, default=0)
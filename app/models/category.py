@@ -1,12 +1,29 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, text
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
+from app.core.slugs import taken_slugs_sql, unique_slug
+
+
+def _default_slug(context):
+    """A free slug for the category being inserted, whichever path inserts it (API, seed scripts, bulk inserts)."""
+    name = context.get_current_parameters()["name"]
+    where, params = taken_slugs_sql(name)
+    taken = set(context.connection.execute(text(f"SELECT slug FROM categories WHERE {where}"), params).scalars())
+    # Rows of the same multi-row INSERT are not in the table yet
+    pending = context.__dict__.setdefault("_pending_slugs", set())
+    slug = unique_slug(name, taken | pending)
+    pending.add(slug)
+    return slug
 
 
 class Category(Base):
     __tablename__ = "categories"
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, nullable=False, index=True)
+    slug = Column(String, unique=True, nullable=True, index=True, default=_default_slug)
+    # Counter cache maintained by SQLite triggers on products (see app/db/migrations.py)
+    product_count = Column(Integer, nullable=False, default=0, server_default="0")
+    available_count = Column(Integer, nullable=False, default=0, server_default="0")
     
     products = relationship("Product", back_populates="category")
 
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime
+
+from app.db.base_class import Base
+
+
+class IdempotencyKey(Base):
+	"""Outcome of a request sent with an Idempotency-Key; status_code is NULL while it is in flight."""
+	__tablename__ = "idempotency_keys"
+	key = Column(String(255), primary_key=True)
+	fingerprint = Column(String(64), nullable=False)
+	status_code = Column(Integer, nullable=True)
+	response_body = Column(LargeBinary, nullable=True)
+	created_at = Column(DateTime(timezone=True), nullable=False)
+	expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -1,11 +1,23 @@
-from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, DateTime, func
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, DateTime, Index, func, select
+from sqlalchemy.orm import column_property, relationship
 from app.db.base_class import Base
 import uuid
+from datetime import datetime, timezone
+
+
+def _utcnow():
+    # Python-side so the value keeps microseconds; it versions the product for ETags
+    return datetime.now(timezone.utc)
 
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Keyset pagination order for GET /products/?cursor=
+        Index("ix_products_created_at_id", "created_at", "id"),
+        # Category listings: category_id = ? ORDER BY created_at, id
+        Index("ix_products_category_id_created_at_id", "category_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     unique_key = Column(String, unique=True, nullable=False, index=True, default=lambda: str(uuid.uuid4()))
@@ -23,11 +35,79 @@ class Product(Base):
     stock = Column(Integer, default=0)
     status = Column(String, default="available")
     
+    # JSON list of URLs (or {"url", "alt", "width", "height"} objects) as submitted;
+    # SQLite triggers mirror it into product_images, which is what reads use
     images = Column(Text, nullable=True)
     available = Column(Integer, default=0)
     sold = Column(Integer, default=0)
     
     category_id = Column(Integer, ForeignKey("categories.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=True, default=_utcnow, onupdate=_utcnow)
     
     category = relationship("Category", back_populates="products")
+    # Rows are written by triggers only, so the ORM never persists this side
+    media = relationship("ProductImage", order_by="ProductImage.position", viewonly=True)
+
+
+class ProductImage(Base):
+    __tablename__ = "product_images"
+    __table_args__ = (
+        Index("ix_product_images_product_id_position", "product_id", "position", unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    position = Column(Integer, nullable=False, default=0)
+    url = Column(String, nullable=False)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    alt = Column(String, nullable=True)
+    
+    job = relationship(
+        "ImageJob",
+        primaryjoin="foreign(ProductImage.url) == ImageJob.source",
+        viewonly=True,
+        uselist=False,
+    )
+
+
+class ImageJob(Base):
+    """Variant generation for one source image URL, queued by a trigger on product_images."""
+    __tablename__ = "image_jobs"
+    
+    source = Column(String, primary_key=True)
+    status = Column(String, nullable=False, default="pending", server_default="pending", index=True)  # pending, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    error = Column(Text, nullable=True)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    # URL of the WebP thumbnail, read by listings; the full set is in variants
+    thumbnail = Column(String, nullable=True)
+    # JSON {"thumb": {"webp": url, "jpeg": url}, "medium": {...}}
+    variants = Column(Text, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# First image by position, selected as a correlated subquery alongside every product
+# row so listings get their thumbnail in the same query
+Product.primary_image = column_property(
+    select(ProductImage.url)
+    .where(ProductImage.product_id == Product.id)
+    .order_by(ProductImage.position)
+    .limit(1)
+    .correlate_except(ProductImage)
+    .scalar_subquery()
+)
+
+# Thumbnail of that first image, once the image worker has rendered it
+Product.primary_thumbnail = column_property(
+    select(ImageJob.thumbnail)
+    .select_from(ProductImage)
+    .outerjoin(ImageJob, ImageJob.source == ProductImage.url)
+    .where(ProductImage.product_id == Product.id)
+    .order_by(ProductImage.position)
+    .limit(1)
+    .correlate_except(ProductImage, ImageJob)
+    .scalar_subquery()
+)
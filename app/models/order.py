@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index, func
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
@@ -6,6 +6,11 @@ from app.db.base_class import Base
 
 class Order(Base):
 	__tablename__ = "orders"
+	__table_args__ = (
+		# Admin listing, newest first: ORDER BY created_at DESC, id DESC with optional filters
+		Index("ix_orders_created_at_id", "created_at", "id"),
+		Index("ix_orders_status_created_at_id", "status", "created_at", "id"),
+	)
 	id = Column(Integer, primary_key=True, index=True)
 	user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
 	customer_name = Column(String, nullable=False)
@@ -24,10 +29,15 @@ class Order(Base):
 	items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
 
 
+# Case-insensitive email/city filters compare lower(column), so index those expressions
+Index("ix_orders_email", func.lower(Order.email))
+Index("ix_orders_city_created_at_id", func.lower(Order.city), Order.created_at, Order.id)
+
+
 class OrderItem(Base):
 	__tablename__ = "order_items"
 	id = Column(Integer, primary_key=True, index=True)
-	order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+	order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
 	product_id = Column(Integer, nullable=False)
 	name = Column(String, nullable=False)
 	image_url = Column(String, nullable=True)
@@ -12,5 +12,7 @@ class User(Base):
 	is_active = Column(Boolean, default=True)
 	is_admin = Column(Boolean, default=False)
 	reset_token = Column(String, nullable=True, index=True)
+	# Carried in each token as "ver"; bumping it revokes every token issued before
+	token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
 
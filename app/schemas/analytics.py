@@ -0,0 +1,24 @@
+from datetime import date
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class SalesRow(BaseModel):
+	day: Optional[date] = None
+	product_id: Optional[int] = None
+	category_id: Optional[int] = None
+	name: Optional[str] = None
+	revenue: float
+	units: int
+	orders: int
+
+
+class SalesReport(BaseModel):
+	group_by: str
+	date_from: Optional[date] = None
+	date_to: Optional[date] = None
+	revenue: float
+	units: int
+	orders: int
+	rows: List[SalesRow]
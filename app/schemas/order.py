@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import List, Optional
 
 
@@ -6,8 +6,9 @@ class OrderItemIn(BaseModel):
 	product_id: int
 	name: str
 	image_url: Optional[str] = None
-	unit_price: float
-	quantity: int
+	# Ignored: prices are always taken from the catalog when the order is placed
+	unit_price: Optional[float] = None
+	quantity: int = Field(..., gt=0)
 
 
 class OrderCreate(BaseModel):
@@ -19,11 +20,12 @@ class OrderCreate(BaseModel):
 	city: str
 	postal_code: Optional[str] = None
 	country: str
-	items: List[OrderItemIn]
+	items: List[OrderItemIn] = Field(..., min_length=1)
 
 
 class OrderItemOut(OrderItemIn):
 	id: int
+	unit_price: float
 	line_total: float
 
 	class Config:
@@ -48,3 +50,13 @@ class OrderOut(BaseModel):
 		from_attributes = True
 
 
+class OrderPage(BaseModel):
+	items: List[OrderOut]
+	next_cursor: Optional[str] = None
+
+
+class OrderItemError(BaseModel):
+	product_id: int
+	requested: int
+	available: int
+	error: str
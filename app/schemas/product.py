@@ -1,6 +1,6 @@
 # filepath: app/schemas/product.py
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from typing import Optional, List, Literal, Union
 from datetime import datetime
 
 
@@ -22,7 +22,8 @@ class ProductBase(BaseModel):
 
 
 class ProductCreate(ProductBase):
-    pass
+    # Imports parse "inf"/"nan" cells as floats; never store them as prices
+    model_config = ConfigDict(allow_inf_nan=False)
 
 
 class ProductUpdate(BaseModel):
@@ -46,6 +47,83 @@ class Product(ProductBase):
     id: int
     unique_key: str
     created_at: datetime
+    # URL of the first entry in product_images, for thumbnails
+    primary_image: Optional[str] = None
+    # WebP thumbnail of primary_image, once the image worker has rendered it
+    primary_thumbnail: Optional[str] = None
 
     class Config:
         from_attributes = True
+
+
+class ProductPage(BaseModel):
+    items: List[Product]
+    next_cursor: Optional[str] = None
+
+
+
+class ProductSearchHit(Product):
+    rank: float
+    snippet: Optional[str] = None
+
+
+
+class ImportRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+
+class ProductImportReport(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False
+
+
+
+PRICE_FIELDS = ("retail_price", "offer_price", "delivery_charges")
+COUNT_FIELDS = ("stock", "available", "sold")
+
+
+class ProductPatch(BaseModel):
+    """
+    One bulk change, addressed by id or unique_key.
+    
+    op "set" assigns value, "add" adds it (use a negative value to subtract) and
+    "percent" scales a price by value percent (-10 is a 10% discount).
+    """
+    model_config = ConfigDict(allow_inf_nan=False)
+
+    id: Optional[int] = None
+    unique_key: Optional[str] = None
+    field: Literal["retail_price", "offer_price", "delivery_charges", "stock", "available", "sold", "status"]
+    op: Literal["set", "add", "percent"] = "set"
+    value: Union[float, str]
+
+    @model_validator(mode="after")
+    def check_patch(self):
+        if (self.id is None) == (self.unique_key is None):
+            raise ValueError("give exactly one of id or unique_key")
+        if self.field == "status":
+            if self.op != "set" or not isinstance(self.value, str):
+                raise ValueError("status only supports op 'set' with a string value")
+            return self
+        if isinstance(self.value, str):
+            raise ValueError(f"{self.field} needs a numeric value")
+        if self.op == "percent" and self.field not in PRICE_FIELDS:
+            raise ValueError("op 'percent' only applies to price fields")
+        if self.field in COUNT_FIELDS and self.value != int(self.value):
+            raise ValueError(f"{self.field} needs a whole number")
+        return self
+
+
+class ProductBulkPatch(BaseModel):
+    patches: List[ProductPatch] = Field(..., min_length=1, max_length=10000)
+
+
+class ProductBulkPatchResult(BaseModel):
+    patches: int
+    statements: int
+    rows_updated: int
+    not_found: List[Union[int, str]] = []
@@ -0,0 +1,151 @@
+"""
+Synthetic catalogs for the load benchmarks.
+
+A dataset is a complete SQLite database built with the app's own schema,
+migrations and triggers (search index, category counters, product_images), so
+the endpoints see what a production database would hold. Building a large one
+takes a while, so each scale is generated once and kept in the data directory.
+
+    python -m benchmarks.dataset --scale 100k
+"""
+import argparse
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, insert
+
+from app.core.analytics import rebuild_sales_rollups
+from app.core.security import get_password_hash
+from app.db.base import Base
+from app.db.migrations import upgrade
+from app.models import Category, Order, OrderItem, Product, User
+
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+PASSWORD = "benchmark-password"
+USERS = 100
+CATEGORIES = ("Rings", "Earrings", "Necklaces", "Bracelets", "Bangles", "Pendants", "Anklets", "Hoops", "Studs", "Chains", "Sets", "Watches")
+TYPES = ("Ring", "Earring", "Necklace", "Bracelet", "Bangle", "Pendant")
+WORDS = ("gold", "silver", "zircon", "pearl", "crystal", "rose", "classic", "bridal", "elegant", "vintage", "minimal", "floral")
+CITIES = ("Lahore", "Karachi", "Islamabad", "Rawalpindi", "Faisalabad", "Multan", "Peshawar", "Quetta")
+STATUSES = ("pending", "confirmed", "shipped", "delivered", "cancelled")
+CHUNK = 20_000
+
+
+def dataset_path(scale: str, data_dir: str = DEFAULT_DATA_DIR) -> str:
+	return os.path.join(data_dir, f"catalog-{scale}.db")
+
+
+def _products(rng: random.Random, start: int, count: int):
+	for i in range(start, start + count):
+		name = f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {rng.choice(TYPES)} {i}"
+		price = float(rng.randrange(300, 20_000, 50))
+		stock = rng.choice((0, 1, 5, 10, 50, 1_000_000))
+		yield {
+			"unique_key": f"bench-{i:08d}",
+			"name": name,
+			"full_name": f"18K {name}",
+			"type": rng.choice(TYPES),
+			"retail_price": price,
+			"offer_price": price * 0.85 if rng.random() < 0.3 else None,
+			"description": " ".join(rng.choice(WORDS) for _ in range(12)),
+			"delivery_charges": 150.0,
+			"stock": stock,
+			"status": "available" if stock else "out_of_stock",
+			"images": json.dumps([f"products/{i}/{n}.jpg" for n in range(rng.randint(1, 3))]),
+			"available": stock,
+			"sold": rng.randrange(100),
+			"category_id": rng.randint(1, len(CATEGORIES)),
+		}
+
+
+def _orders(rng: random.Random, start: int, count: int, products: int, now: datetime):
+	orders, items = [], []
+	for order_id in range(start, start + count):
+		total = 0.0
+		for _ in range(rng.randint(1, 3)):
+			quantity = rng.randint(1, 3)
+			unit_price = float(rng.randrange(300, 20_000, 50))
+			total += unit_price * quantity
+			items.append({
+				"order_id": order_id,
+				"product_id": rng.randint(1, products),
+				"name": "Benchmark item",
+				"unit_price": unit_price,
+				"quantity": quantity,
+				"line_total": unit_price * quantity,
+			})
+		customer = rng.randrange(max(products // 10, 1))
+		orders.append({
+			"id": order_id,
+			"customer_name": f"Customer {customer}",
+			"email": f"customer{customer}@example.com",
+			"phone": "03000000000",
+			"address_line1": f"{customer} Mall Road",
+			"city": rng.choice(CITIES),
+			"country": "Pakistan",
+			"status": rng.choice(STATUSES),
+			"total_amount": total,
+			"created_at": now - timedelta(seconds=rng.randrange(365 * 86400)),
+		})
+	return orders, items
+
+
+def build_dataset(path: str, products: int, orders: int, seed: int = 1) -> None:
+	"""Create ``path`` with ``products`` products and ``orders`` orders (plus their items and rollups)."""
+	os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+	tmp = f"{path}.partial"
+	for leftover in (tmp, f"{tmp}-wal", f"{tmp}-shm"):
+		if os.path.exists(leftover):
+			os.remove(leftover)
+	engine = create_engine(f"sqlite:///{tmp}")
+	Base.metadata.create_all(engine)
+	upgrade(engine)
+	rng = random.Random(seed)
+	now = datetime.now(timezone.utc)
+	with engine.begin() as conn:
+		conn.execute(insert(Category), [{"name": name, "slug": name.lower()} for name in CATEGORIES])
+		hashed = get_password_hash(PASSWORD)
+		conn.execute(insert(User), [{"email": f"user{i}@example.com", "hashed_password": hashed} for i in range(USERS)])
+	for start in range(1, products + 1, CHUNK):
+		with engine.begin() as conn:
+			conn.execute(insert(Product), list(_products(rng, start, min(CHUNK, products + 1 - start))))
+	for start in range(1, orders + 1, CHUNK):
+		order_rows, item_rows = _orders(rng, start, min(CHUNK, orders + 1 - start), products, now)
+		with engine.begin() as conn:
+			conn.execute(insert(Order), order_rows)
+			conn.execute(insert(OrderItem), item_rows)
+	rebuild_sales_rollups(engine)
+	with engine.connect() as conn:
+		conn.exec_driver_sql("ANALYZE")
+		conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+	engine.dispose()
+	# Only a complete dataset gets the final name, so an interrupted build is never reused
+	os.replace(tmp, path)
+
+
+def ensure_dataset(scale: str, data_dir: str = DEFAULT_DATA_DIR) -> str:
+	path = dataset_path(scale, data_dir)
+	if not os.path.exists(path):
+		count = SCALES[scale]
+		started = time.perf_counter()
+		print(f"Building the {scale} dataset ({count} products, {count} orders) in {path} ...")
+		build_dataset(path, count, count)
+		print(f"Built in {time.perf_counter() - started:.0f}s")
+	return path
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--scale", choices=sorted(SCALES), default="10k")
+	parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+	args = parser.parse_args()
+	print(ensure_dataset(args.scale, args.data_dir))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,119 @@
+"""
+Cost of a product list response through FastAPI's default response_model path
+versus the precompiled TypeAdapter path used by the list endpoints, and versus
+serving bytes already held by the catalog cache.
+
+Each path is mounted on a throwaway app and driven in-process through ASGI, so
+the numbers include whatever the installed FastAPI version does for
+response_model (validation, encoding, JSONResponse rendering) but no database
+or network time.
+
+    python -m benchmarks.json_serialization --rows 100 1000
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import List
+
+import httpx
+from fastapi import FastAPI, Response
+from pydantic import TypeAdapter
+
+from app.core.responses import RawJSONResponse
+from app.models import Product as ProductModel
+from app.schemas.product import Product
+
+try:
+	import orjson
+except ImportError:  # optional, only used for comparison
+	orjson = None
+
+
+PRODUCT_LIST = TypeAdapter(List[Product])
+
+
+def _rows(n: int) -> List[ProductModel]:
+	now = datetime.now(timezone.utc)
+	return [
+		ProductModel(
+			id=i,
+			unique_key=f"00000000-0000-0000-0000-{i:012d}",
+			name=f"Zircon Ring {i}",
+			full_name=f"18K Gold Zircon Ring {i} with Elegant Design",
+			type="Ring",
+			retail_price=650.0,
+			offer_price=550.0,
+			currency="PKR",
+			description="Elegant zircon band ring with beautiful gold finish.",
+			delivery_charges=100.0,
+			stock=10,
+			status="available",
+			images='["gold_ring_1.jpg", "gold_ring_2.jpg"]',
+			available=25,
+			sold=15,
+			category_id=1,
+			created_at=now,
+		)
+		for i in range(n)
+	]
+
+
+def _app(rows) -> FastAPI:
+	app = FastAPI()
+
+	@app.get("/default", response_model=List[Product])
+	async def default_path():
+		return rows
+
+	@app.get("/type-adapter", response_model=List[Product])
+	async def type_adapter_path():
+		return RawJSONResponse(PRODUCT_LIST.dump_json(PRODUCT_LIST.validate_python(rows, from_attributes=True)))
+
+	encoded = PRODUCT_LIST.dump_json(PRODUCT_LIST.validate_python(rows, from_attributes=True))
+
+	@app.get("/cached-bytes", response_model=List[Product])
+	async def cached_bytes_path():
+		# A catalog cache hit: the bytes were encoded when the entry was filled
+		return RawJSONResponse(encoded)
+
+	if orjson is not None:
+		@app.get("/orjson", response_model=List[Product])
+		async def orjson_path():
+			return Response(orjson.dumps([Product.model_validate(p).model_dump() for p in rows]), media_type="application/json")
+
+	return app
+
+
+async def _measure(client: httpx.AsyncClient, path: str, requests: int) -> float:
+	await client.get(path)  # warm-up
+	start = time.perf_counter()
+	for _ in range(requests):
+		response = await client.get(path)
+		response.raise_for_status()
+	return (time.perf_counter() - start) / requests
+
+
+async def _run(rows_list: List[int], requests: int) -> None:
+	print(f"{'rows':>6}  {'path':<14}{'ms/request':>12}{'speedup':>9}")
+	for n in rows_list:
+		app = _app(_rows(n))
+		paths = ["/default", "/type-adapter", "/cached-bytes"] + (["/orjson"] if orjson is not None else [])
+		async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+			baseline = None
+			for path in paths:
+				seconds = await _measure(client, path, max(5, requests * 100 // n))
+				baseline = baseline or seconds
+				print(f"{n:>6}  {path[1:]:<14}{seconds * 1000:>12.3f}{baseline / seconds:>8.1f}x")
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000])
+	parser.add_argument("--requests", type=int, default=200, help="requests per path at 100 rows (scaled down for larger pages)")
+	args = parser.parse_args()
+	asyncio.run(_run(args.rows, args.requests))
+
+
+if __name__ == "__main__":
+	main()
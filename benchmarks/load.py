@@ -0,0 +1,234 @@
+"""
+Load test of every API endpoint against a synthetic catalog, in-process.
+
+The app is driven through an ASGI client (no server, no network) against a
+working copy of a generated dataset (see benchmarks/dataset.py) of 10k, 100k
+or 1M products and as many orders. Each endpoint gets --requests requests from
+--concurrency concurrent clients, with randomized ids, filters and search
+terms; the report shows throughput and p50/p95/p99 latency per endpoint.
+
+Results can be saved as a baseline and later runs compared against it: an
+endpoint whose p95 grew, or whose throughput fell, by more than --tolerance
+fails the run (exit status 1), as does any unexpected error status.
+
+    python -m benchmarks.load --scale 100k --concurrency 16 --requests 500 --save-baseline
+    python -m benchmarks.load --scale 100k --concurrency 16 --requests 500
+"""
+import argparse
+import asyncio
+import fnmatch
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+
+ADMIN = {"x-role": "admin"}
+WORDS = ("gold", "silver", "zircon", "pearl", "crystal", "rose", "classic", "bridal", "elegant", "vintage")
+SLUGS = ("rings", "earrings", "necklaces", "bracelets", "bangles", "pendants", "anklets", "hoops", "studs", "chains", "sets", "watches")
+
+
+class Scenario(NamedTuple):
+	name: str
+	method: str
+	# rng, dataset size -> (path, query params, JSON body, headers)
+	request: Callable[[random.Random, int], Tuple[str, Optional[dict], Optional[dict], Optional[dict]]]
+	ok: Tuple[int, ...] = (200,)
+
+
+def _key(product_id: int) -> str:
+	return f"bench-{product_id:08d}"
+
+
+def _sales_window(rng: random.Random) -> dict:
+	start = date.today() - timedelta(days=rng.randrange(30, 365))
+	return {"from": start.isoformat(), "to": (start + timedelta(days=30)).isoformat(), "group_by": rng.choice(("day", "product", "category"))}
+
+
+def _order(rng: random.Random, size: int) -> dict:
+	return {
+		"customer_name": "Load Test",
+		"email": f"load{rng.randrange(1000)}@example.com",
+		"phone": "03000000000",
+		"address_line1": "1 Benchmark Street",
+		"city": "Lahore",
+		"country": "Pakistan",
+		"items": [{"product_id": rng.randint(1, size), "name": "Benchmark item", "quantity": 1}],
+	}
+
+
+SCENARIOS = (
+	Scenario("products.list", "GET", lambda rng, n: ("/api/v1/products/", {"limit": 50, "cursor": "", "category_id": rng.randint(1, 12)}, None, None)),
+	Scenario("products.list_offset", "GET", lambda rng, n: ("/api/v1/products/", {"limit": 50, "offset": rng.randrange(min(n, 5000))}, None, None)),
+	Scenario("products.list_status", "GET", lambda rng, n: ("/api/v1/products/", {"limit": 50, "cursor": "", "status": rng.choice(("available", "out_of_stock"))}, None, None)),
+	Scenario("products.get", "GET", lambda rng, n: (f"/api/v1/products/{rng.randint(1, n)}", None, None, None)),
+	Scenario("products.by_key", "GET", lambda rng, n: (f"/api/v1/products/by-key/{_key(rng.randint(1, n))}", None, None, None)),
+	Scenario("products.details", "GET", lambda rng, n: (f"/api/v1/products/details/{rng.randint(1, n)}", None, None, None)),
+	Scenario("products.details_by_key", "GET", lambda rng, n: (f"/api/v1/products/details/by-key/{_key(rng.randint(1, n))}", None, None, None)),
+	Scenario("products.category", "GET", lambda rng, n: (f"/api/v1/products/category/{rng.choice(SLUGS)}", None, None, None)),
+	Scenario("products.search", "GET", lambda rng, n: ("/api/v1/products/search", {"q": f"{rng.choice(WORDS)} {rng.choice(WORDS)}"}, None, None)),
+	Scenario("categories.list", "GET", lambda rng, n: ("/api/v1/categories/", None, None, None)),
+	Scenario("categories.with_counts", "GET", lambda rng, n: ("/api/v1/categories/with-counts", None, None, None)),
+	Scenario("orders.list", "GET", lambda rng, n: ("/api/v1/orders/", {"limit": 50, "cursor": ""}, None, ADMIN)),
+	Scenario("orders.list_filtered", "GET", lambda rng, n: ("/api/v1/orders/", {"limit": 50, "status": "shipped", "city": "lahore"}, None, ADMIN)),
+	Scenario("orders.get", "GET", lambda rng, n: (f"/api/v1/orders/{rng.randint(1, n)}", None, None, ADMIN)),
+	Scenario("analytics.sales", "GET", lambda rng, n: ("/api/v1/analytics/sales", _sales_window(rng), None, ADMIN)),
+	# Random products may be out of stock: a 409 is the endpoint working as intended
+	Scenario("orders.create", "POST", lambda rng, n: ("/api/v1/orders/", None, _order(rng, n), None), ok=(200, 409)),
+	Scenario("auth.login", "POST", lambda rng, n: ("/api/v1/auth/login", None, {"email": f"user{rng.randrange(100)}@example.com", "password": "benchmark-password"}, None)),
+)
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+	return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _run_scenario(client, scenario: Scenario, size: int, requests: int, concurrency: int, warmup: int, seed: int) -> dict:
+	rng = random.Random(f"{seed}:{scenario.name}")
+	for _ in range(warmup):
+		path, params, body, headers = scenario.request(rng, size)
+		await client.request(scenario.method, path, params=params, json=body, headers=headers)
+
+	latencies: List[float] = []
+	errors: Dict[int, int] = {}
+	remaining = requests
+
+	async def worker() -> None:
+		nonlocal remaining
+		while remaining > 0:
+			remaining -= 1
+			path, params, body, headers = scenario.request(rng, size)
+			started = time.perf_counter()
+			response = await client.request(scenario.method, path, params=params, json=body, headers=headers)
+			latencies.append(time.perf_counter() - started)
+			if response.status_code not in scenario.ok:
+				errors[response.status_code] = errors.get(response.status_code, 0) + 1
+
+	started = time.perf_counter()
+	await asyncio.gather(*[worker() for _ in range(concurrency)])
+	elapsed = time.perf_counter() - started
+	latencies.sort()
+	return {
+		"requests": len(latencies),
+		"rps": len(latencies) / elapsed,
+		"p50": _percentile(latencies, 50) * 1000,
+		"p95": _percentile(latencies, 95) * 1000,
+		"p99": _percentile(latencies, 99) * 1000,
+		"errors": errors,
+	}
+
+
+async def _run(scenarios: List[Scenario], size: int, args) -> Dict[str, dict]:
+	import httpx
+	from app.main import app
+	from app.core.security import password_hasher
+	from app.db.session import async_engine
+
+	results = {}
+	transport = httpx.ASGITransport(app=app)
+	limits = httpx.Limits(max_connections=None)
+	try:
+		async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits, timeout=None) as client:
+			for scenario in scenarios:
+				result = await _run_scenario(client, scenario, size, args.requests, args.concurrency, args.warmup, args.seed)
+				results[scenario.name] = result
+				errors = ", ".join(f"{status}x{count}" for status, count in sorted(result["errors"].items())) or "-"
+				print(
+					f"{scenario.name:<26}{result['rps']:>9.1f}{result['p50']:>9.1f}{result['p95']:>9.1f}{result['p99']:>9.1f}  {errors}",
+					flush=True,
+				)
+	finally:
+		password_hasher.close()
+		await async_engine.dispose()
+	return results
+
+
+def _compare(results: Dict[str, dict], baseline: dict, tolerance: float) -> List[str]:
+	regressions = []
+	for name, result in results.items():
+		before = baseline["results"].get(name)
+		if before is None:
+			continue
+		if result["p95"] > before["p95"] * (1 + tolerance):
+			regressions.append(f"{name}: p95 {before['p95']:.1f} -> {result['p95']:.1f} ms")
+		if result["rps"] < before["rps"] * (1 - tolerance):
+			regressions.append(f"{name}: throughput {before['rps']:.1f} -> {result['rps']:.1f} req/s")
+	return regressions
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--scale", choices=("10k", "100k", "1m"), default="10k")
+	parser.add_argument("--concurrency", type=int, default=8)
+	parser.add_argument("--requests", type=int, default=300, help="requests per endpoint")
+	parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per endpoint first")
+	parser.add_argument("--only", nargs="*", help="endpoint name patterns, e.g. 'products.*'")
+	parser.add_argument("--no-cache", action="store_true", help="disable the catalog cache so every read hits the database")
+	parser.add_argument("--seed", type=int, default=1)
+	parser.add_argument("--data-dir", help="where generated datasets are kept (default benchmarks/data)")
+	parser.add_argument("--baseline", help="baseline file (default benchmarks/baselines/<scale>.json)")
+	parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline instead of comparing")
+	parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative p95/throughput regression")
+	args = parser.parse_args()
+
+	scenarios = [s for s in SCENARIOS if not args.only or any(fnmatch.fnmatch(s.name, p) for p in args.only)]
+	baseline_path = args.baseline or os.path.join(os.path.dirname(__file__), "baselines", f"{args.scale}.json")
+	workdir = tempfile.mkdtemp(prefix="jem-load-")
+	database = os.path.join(workdir, "bench.db")
+
+	# Configure the app before it is imported: a working copy of the dataset, no background
+	# image worker, no rate limiting (one client sends everything), no slow-query log
+	os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+	os.environ["IMAGE_WORKERS"] = "0"
+	os.environ["RATE_LIMIT_ENABLED"] = "0"
+	# The report is the point; set SLOW_QUERY_MS to also log slow statements
+	os.environ.setdefault("SLOW_QUERY_MS", "0")
+	if args.no_cache:
+		os.environ["CATALOG_CACHE_TTL_SECONDS"] = "0"
+	from benchmarks.dataset import DEFAULT_DATA_DIR, SCALES, ensure_dataset
+
+	try:
+		# Writes (orders, logins re-hashing) go to the copy, so every run starts from the same data
+		shutil.copyfile(ensure_dataset(args.scale, args.data_dir or DEFAULT_DATA_DIR), database)
+		size = SCALES[args.scale]
+		print(f"{args.scale}: {len(scenarios)} endpoints, {args.requests} requests each, concurrency {args.concurrency}")
+		print(f"{'endpoint':<26}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  errors")
+		results = asyncio.run(_run(scenarios, size, args))
+	finally:
+		shutil.rmtree(workdir, ignore_errors=True)
+
+	failed = [name for name, result in results.items() if result["errors"]]
+	run = {"scale": args.scale, "concurrency": args.concurrency, "requests": args.requests, "cache": not args.no_cache, "results": results}
+	if args.save_baseline:
+		os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+		with open(baseline_path, "w") as handle:
+			json.dump(run, handle, indent=2)
+		print(f"Baseline saved to {baseline_path}")
+	elif os.path.exists(baseline_path):
+		with open(baseline_path) as handle:
+			baseline = json.load(handle)
+		settings = ("scale", "concurrency", "requests", "cache")
+		if any(baseline.get(key) != run[key] for key in settings):
+			print(f"Baseline {baseline_path} was recorded with different settings; not comparing")
+		else:
+			regressions = _compare(results, baseline, args.tolerance)
+			for regression in regressions:
+				print(f"REGRESSION {regression}")
+			if not regressions:
+				print(f"No regressions against {baseline_path} (tolerance {args.tolerance:.0%})")
+			failed += regressions
+	else:
+		print(f"No baseline at {baseline_path}; run with --save-baseline to record one")
+
+	if failed:
+		print(f"FAILED: {len(failed)} problem(s)")
+		sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
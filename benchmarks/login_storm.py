@@ -0,0 +1,135 @@
+"""
+Catalog read latency during a login storm, with password hashing on the web
+server's threadpool versus on the dedicated process pool (PASSWORD_HASH_WORKERS).
+
+The app is driven in-process through ASGI against a throwaway database: catalog
+readers page through GET /products/ (with the catalog cache disabled, so every
+read hits the database) while login clients hammer POST /auth/login. Each
+scenario reports catalog p50/p95/p99 and login throughput, next to a run with
+no logins at all.
+
+    python -m benchmarks.login_storm --readers 8 --logins 32 --seconds 5 --workers 2
+"""
+import os
+import tempfile
+
+# A throwaway database and no catalog cache, before anything imports app.core.config
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='jem-bench-'), 'bench.db')}"
+os.environ["CATALOG_CACHE_TTL_SECONDS"] = "0"
+os.environ.setdefault("IMAGE_WORKERS", "0")
+
+import argparse
+import asyncio
+import random
+import time
+from typing import List
+
+import httpx
+from sqlalchemy import insert
+
+from app.main import app
+from app.core.security import get_password_hash, password_hasher
+from app.db.session import SessionLocal, async_engine
+from app.models import Category, Product, User
+
+
+PASSWORD = "correct horse battery staple"
+
+
+def _seed(products: int, users: int) -> None:
+	hashed = get_password_hash(PASSWORD)
+	with SessionLocal() as db:
+		db.execute(insert(Category), [{"name": f"Category {i}", "slug": f"category-{i}"} for i in range(12)])
+		db.execute(
+			insert(Product),
+			[
+				{"name": f"Product {i}", "retail_price": 100 + i % 900, "stock": 50, "category_id": 1 + i % 12}
+				for i in range(products)
+			],
+		)
+		db.execute(insert(User), [{"email": f"user{i}@example.com", "hashed_password": hashed} for i in range(users)])
+		db.commit()
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+	ordered = sorted(samples)
+	return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else float("nan")
+
+
+async def _scenario(workers: int, readers: int, logins: int, users: int, seconds: float) -> dict:
+	password_hasher.close()
+	password_hasher.workers = workers
+	latencies: List[float] = []
+	outcomes = {"logins": 0, "busy": 0}
+	deadline = time.perf_counter() + seconds
+
+	async def reader(client: httpx.AsyncClient) -> None:
+		rng = random.Random()
+		while time.perf_counter() < deadline:
+			started = time.perf_counter()
+			response = await client.get("/api/v1/products/", params={"limit": 20, "category_id": rng.randint(1, 12)})
+			response.raise_for_status()
+			latencies.append(time.perf_counter() - started)
+
+	async def login(client: httpx.AsyncClient) -> None:
+		rng = random.Random()
+		while time.perf_counter() < deadline:
+			response = await client.post(
+				"/api/v1/auth/login", json={"email": f"user{rng.randrange(users)}@example.com", "password": PASSWORD}
+			)
+			if response.status_code == 503:
+				outcomes["busy"] += 1
+				await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+			else:
+				response.raise_for_status()
+				outcomes["logins"] += 1
+
+	limits = httpx.Limits(max_connections=None)
+	async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", limits=limits) as client:
+		if workers > 0:
+			# Spawn the pool up front so process start-up is not counted as latency
+			await password_hasher.hash(PASSWORD)
+		await asyncio.gather(*[reader(client) for _ in range(readers)], *[login(client) for _ in range(logins)])
+	await async_engine.dispose()
+	return {
+		"reads": len(latencies),
+		"p50": _percentile(latencies, 50) * 1000,
+		"p95": _percentile(latencies, 95) * 1000,
+		"p99": _percentile(latencies, 99) * 1000,
+		"max": max(latencies) * 1000 if latencies else float("nan"),
+		"logins/s": outcomes["logins"] / seconds,
+		"503s": outcomes["busy"],
+	}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--products", type=int, default=5000)
+	parser.add_argument("--users", type=int, default=200)
+	parser.add_argument("--readers", type=int, default=8)
+	parser.add_argument("--logins", type=int, default=32, help="concurrent login clients")
+	parser.add_argument("--seconds", type=float, default=5.0)
+	parser.add_argument("--workers", type=int, default=2, help="process pool size for the pooled run")
+	args = parser.parse_args()
+
+	_seed(args.products, args.users)
+	print(f"{args.readers} catalog readers, {args.logins} login clients, {args.seconds}s per run")
+	print(f"{'hashing':<22}{'reads':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'logins/s':>10}{'503s':>7}")
+	scenarios = (
+		("no logins", args.workers, 0),
+		("threadpool", 0, args.logins),
+		(f"process pool ({args.workers})", args.workers, args.logins),
+	)
+	try:
+		for name, workers, logins in scenarios:
+			result = asyncio.run(_scenario(workers, args.readers, logins, args.users, args.seconds))
+			print(
+				f"{name:<22}{result['reads']:>8}{result['p50']:>9.1f}{result['p95']:>9.1f}{result['p99']:>9.1f}"
+				f"{result['max']:>9.1f}{result['logins/s']:>10.0f}{result['503s']:>7}"
+			)
+	finally:
+		password_hasher.close()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,138 @@
+"""
+Read throughput under concurrent writers, with and without the SQLite connection profile.
+
+Each run builds a fresh database file, then starts reader threads (product by id and
+category listings) next to writer threads (stock updates, one commit each) for a fixed
+duration.
+
+    python -m benchmarks.sqlite_profile --products 20000 --readers 8 --writers 2 --seconds 5
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.exc import OperationalError
+
+from app.db.base import Base
+from app.db.session import SQLITE_PRAGMAS, apply_sqlite_profile
+from app.models import Category, Product
+
+
+def _build_database(path: str, products: int, categories: int = 12) -> None:
+	engine = create_engine(f"sqlite:///{path}")
+	Base.metadata.create_all(engine)
+	with engine.begin() as conn:
+		conn.execute(insert(Category), [{"name": f"Category {i}", "slug": f"category-{i}"} for i in range(categories)])
+		conn.execute(
+			insert(Product),
+			[
+				{
+					"unique_key": f"key-{i}",
+					"name": f"Product {i}",
+					"retail_price": 100 + i % 900,
+					"stock": 50,
+					"status": "available",
+					"category_id": 1 + i % categories,
+				}
+				for i in range(products)
+			],
+		)
+	engine.dispose()
+
+
+def _run(path: str, tuned: bool, products: int, readers: int, writers: int, seconds: float) -> dict:
+	engine = create_engine(
+		f"sqlite:///{path}",
+		connect_args={"check_same_thread": False},
+		pool_size=readers + writers,
+		max_overflow=0,
+	)
+	if tuned:
+		apply_sqlite_profile(engine, SQLITE_PRAGMAS)
+	else:
+		# The old default: rollback journal; switch back in case a previous tuned run left the file in WAL mode
+		with engine.connect() as conn:
+			conn.exec_driver_sql("PRAGMA journal_mode=DELETE")
+
+	counts = {"reads": 0, "writes": 0, "locked": 0}
+	lock = threading.Lock()
+	stop = threading.Event()
+
+	def reader():
+		done = locked = 0
+		rng = random.Random()
+		with engine.connect() as conn:
+			while not stop.is_set():
+				try:
+					if rng.random() < 0.5:
+						conn.execute(text("SELECT * FROM products WHERE id = :id"), {"id": rng.randint(1, products)}).all()
+					else:
+						conn.execute(
+							text("SELECT * FROM products WHERE category_id = :c ORDER BY created_at, id LIMIT 20"),
+							{"c": rng.randint(1, 12)},
+						).all()
+					conn.rollback()
+					done += 1
+				except OperationalError:
+					conn.rollback()
+					locked += 1
+		with lock:
+			counts["reads"] += done
+			counts["locked"] += locked
+
+	def writer():
+		done = locked = 0
+		rng = random.Random()
+		with engine.connect() as conn:
+			while not stop.is_set():
+				try:
+					conn.execute(text("UPDATE products SET stock = stock - 1 WHERE id = :id"), {"id": rng.randint(1, products)})
+					conn.commit()
+					done += 1
+				except OperationalError:
+					conn.rollback()
+					locked += 1
+		with lock:
+			counts["writes"] += done
+			counts["locked"] += locked
+
+	threads = [threading.Thread(target=reader) for _ in range(readers)]
+	threads += [threading.Thread(target=writer) for _ in range(writers)]
+	for t in threads:
+		t.start()
+	time.sleep(seconds)
+	stop.set()
+	for t in threads:
+		t.join()
+	engine.dispose()
+	return {
+		"reads/s": counts["reads"] / seconds,
+		"writes/s": counts["writes"] / seconds,
+		"locked errors": counts["locked"],
+	}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--products", type=int, default=20000)
+	parser.add_argument("--readers", type=int, default=8)
+	parser.add_argument("--writers", type=int, default=2)
+	parser.add_argument("--seconds", type=float, default=5.0)
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as tmp:
+		path = os.path.join(tmp, "bench.db")
+		_build_database(path, args.products)
+		print(f"{args.products} products, {args.readers} readers, {args.writers} writers, {args.seconds}s per run")
+		print(f"{'profile':<10}{'reads/s':>12}{'writes/s':>12}{'locked errors':>16}")
+		for name, tuned in (("default", False), ("tuned", True)):
+			result = _run(path, tuned, args.products, args.readers, args.writers, args.seconds)
+			print(f"{name:<10}{result['reads/s']:>12.0f}{result['writes/s']:>12.0f}{result['locked errors']:>16}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# Point the app at a throwaway database before anything imports app.core.config
+_db_dir = tempfile.mkdtemp(prefix="jem-test-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_db_dir, 'test.db')}")
+# Stress tests fire hundreds of requests from one client; test_rate_limit.py builds its own limiter
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
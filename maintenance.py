@@ -0,0 +1,70 @@
+"""
+Maintenance commands for the database.
+
+Usage:
+    python maintenance.py rebuild-sales                # recompute the daily sales rollups from all orders
+    python maintenance.py reconcile-category-counts    # recount products per category, fixing any drift
+    python maintenance.py process-images               # render every queued image variant, then exit
+    python maintenance.py requeue-images               # queue every image again (e.g. after changing sizes)
+"""
+import argparse
+import asyncio
+import time
+
+from app.db.session import AsyncSessionLocal, engine, init_db
+from app.db.migrations import reconcile_category_counts
+from app.core.analytics import rebuild_sales_rollups
+from app.core.image_jobs import ImageWorker, requeue_image_jobs
+
+
+def rebuild_sales() -> None:
+    started = time.perf_counter()
+    rebuild_sales_rollups(engine)
+    print(f"✅ Sales rollups rebuilt in {time.perf_counter() - started:.2f}s")
+
+
+def reconcile_counts() -> None:
+    fixed = reconcile_category_counts(engine)
+    print(f"✅ Category counts reconciled ({fixed} categories corrected)")
+
+
+async def _drain_image_queue() -> int:
+    worker = ImageWorker()
+    processed = 0
+    try:
+        while batch := await worker.run_pending():
+            processed += batch
+    finally:
+        worker.close()
+    return processed
+
+
+def process_images() -> None:
+    started = time.perf_counter()
+    processed = asyncio.run(_drain_image_queue())
+    print(f"✅ {processed} image jobs processed in {time.perf_counter() - started:.2f}s")
+
+
+async def _requeue_all() -> int:
+    async with AsyncSessionLocal() as db:
+        return await requeue_image_jobs(db, failed_only=False)
+
+
+def requeue_images() -> None:
+    print(f"✅ {asyncio.run(_requeue_all())} image jobs queued")
+
+
+COMMANDS = {
+    "rebuild-sales": rebuild_sales,
+    "reconcile-category-counts": reconcile_counts,
+    "process-images": process_images,
+    "requeue-images": requeue_images,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Database maintenance commands")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args()
+    init_db()
+    COMMANDS[args.command]()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Category slugs: names that slugify alike get distinct slugs (through the
+API, plain ORM inserts and the upgrade backfill), and unknown slugs do not
+reload the slug map on every request.
+Run with: python -m pytest -q test_category_slugs.py
+"""
+
+import asyncio
+import os
+import tempfile
+import uuid
+
+import httpx
+from sqlalchemy import create_engine, text
+
+from app.main import app
+from app.core.slugs import category_slugs
+from app.db.base import Base
+from app.db.migrations import upgrade
+from app.db.session import SessionLocal, async_engine
+from app.models import Category
+
+ADMIN = {"x-role": "admin"}
+
+
+async def _requests(steps):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        try:
+            return await steps(client)
+        finally:
+            await async_engine.dispose()
+
+
+def test_colliding_names_get_distinct_slugs():
+    name = f"Slug {uuid.uuid4().hex[:8]}"
+
+    async def steps(client):
+        created = [await client.post("/api/v1/categories/", params={"name": n}, headers=ADMIN) for n in (name, f"{name}!", f"{name}?")]
+        pages = [await client.get(f"/api/v1/products/category/{name.lower().replace(' ', '-')}{suffix}") for suffix in ("", "-2", "-3")]
+        return [r.status_code for r in created], [r.status_code for r in pages]
+
+    assert asyncio.run(_requests(steps)) == ([200, 200, 200], [200, 200, 200])
+
+
+def test_unknown_slugs_reload_the_map_at_most_once():
+    refreshes = []
+    refresh = category_slugs.refresh
+
+    async def counting_refresh(db):
+        refreshes.append(1)
+        await refresh(db)
+
+    async def steps(client):
+        category_slugs.refresh = counting_refresh
+        try:
+            return [(await client.get(f"/api/v1/products/category/missing-{n}")).status_code for n in range(20)]
+        finally:
+            del category_slugs.refresh
+
+    category_slugs._refreshed_at = 0.0
+    assert asyncio.run(_requests(steps)) == [404] * 20
+    assert len(refreshes) == 1
+
+
+def test_default_slugs_are_unique_within_one_insert():
+    name = f"Batch {uuid.uuid4().hex[:8]}"
+    db = SessionLocal()
+    try:
+        categories = [Category(name=name), Category(name=f"{name}!"), Category(name=f"{name}?")]
+        db.add_all(categories)
+        db.commit()
+        base = name.lower().replace(" ", "-")
+        assert [c.slug for c in categories] == [base, f"{base}-2", f"{base}-3"]
+    finally:
+        db.close()
+
+
+def test_upgrade_backfills_colliding_slugs():
+    # A database from before slugs existed, holding names that slugify alike
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='jem-slugs-'), 'app.db')}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_categories_slug"))
+        conn.execute(text("ALTER TABLE categories DROP COLUMN slug"))
+        conn.execute(text("INSERT INTO categories (name) VALUES ('Rings'), ('Rings!'), ('***')"))
+
+    upgrade(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT slug FROM categories ORDER BY id")).scalars().all() == ["rings", "rings-2", "category"]
+    engine.dispose()
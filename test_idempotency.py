@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Idempotency-Key on POST /orders/: a retry replays the stored outcome, and a
+claim left behind by a crashed worker is taken over once its lease expires.
+Run with: python -m pytest -q test_idempotency.py
+"""
+
+import asyncio
+import uuid
+
+import httpx
+
+from app.main import app
+from app.core import idempotency
+from app.core.idempotency import claim_idempotency_key, request_fingerprint
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine
+from app.models import Category, Product
+from app.schemas.order import OrderCreate
+
+
+def _order():
+    db = SessionLocal()
+    try:
+        category = Category(name=f"Idempotency {uuid.uuid4().hex[:8]}")
+        db.add(category)
+        db.flush()
+        product = Product(name="Idempotent item", retail_price=100.0, stock=10, category_id=category.id)
+        db.add(product)
+        db.commit()
+        return {
+            "customer_name": "Retry Test",
+            "email": "retry@example.com",
+            "phone": "03000000000",
+            "address_line1": "1 Test Street",
+            "city": "Lahore",
+            "country": "Pakistan",
+            "items": [{"product_id": product.id, "name": "x", "quantity": 1}],
+        }
+    finally:
+        db.close()
+
+
+async def _post_twice(payload, key):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        responses = [await client.post("/api/v1/orders/", json=payload, headers={"idempotency-key": key}) for _ in range(2)]
+    await async_engine.dispose()
+    return responses
+
+
+async def _abandon_claim(payload, key):
+    # What a worker that dies mid-checkout leaves behind: a claim with no outcome
+    async with AsyncSessionLocal() as db:
+        assert await claim_idempotency_key(db, key, request_fingerprint(OrderCreate(**payload).model_dump(mode="json"))) is None
+    await async_engine.dispose()
+
+
+def test_abandoned_claim_is_taken_over_after_its_lease(monkeypatch):
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_LEASE_SECONDS", 0)
+    # Fail fast instead of waiting the default 10s if the claim is not taken over
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_WAIT_SECONDS", 0.5)
+    payload = _order()
+    key = uuid.uuid4().hex
+    asyncio.run(_abandon_claim(payload, key))
+
+    first, retry = asyncio.run(_post_twice(payload, key))
+
+    assert first.status_code == 200 and "idempotent-replayed" not in first.headers
+    # The stored outcome gets the full TTL, not the lease
+    assert retry.status_code == 200 and retry.headers["idempotent-replayed"] == "true"
+    assert retry.json()["id"] == first.json()["id"]
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Remote image sources: only hosts in IMAGE_SOURCE_HOSTS are fetched, and
+never when they resolve to a loopback/private address (SSRF).
+Run with: python -m pytest -q test_image_sources.py
+"""
+
+import http.server
+import threading
+
+import pytest
+
+from app.core.images import render_variants
+
+
+class _Image(http.server.BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.path)
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_url():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Image)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _Image.requests.clear()
+    yield f"http://localhost:{server.server_port}/image.jpg"
+    server.shutdown()
+
+
+def test_host_must_be_allowed(local_url, tmp_path):
+    with pytest.raises(ValueError, match="IMAGE_SOURCE_HOSTS"):
+        render_variants(local_url, str(tmp_path), str(tmp_path), ("cdn.example.com",))
+    assert _Image.requests == []
+
+
+def test_internal_addresses_are_refused(local_url, tmp_path):
+    with pytest.raises(ValueError, match="non-public address 127.0.0.1"):
+        render_variants(local_url, str(tmp_path), str(tmp_path), ("localhost",))
+    assert _Image.requests == []
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+/metrics labels requests by route template (never the raw path) and unknown
+methods as OTHER, and every response carries a Server-Timing header.
+Run with: python -m pytest -q test_metrics.py
+"""
+
+import asyncio
+
+import httpx
+
+from app.main import app
+from app.db.session import async_engine
+
+
+async def _scrape(paths):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        responses = [await client.get(path) for path in paths]
+        metrics = await client.get("/metrics")
+    await async_engine.dispose()
+    return responses, metrics
+
+
+def test_requests_are_labelled_by_route_template():
+    paths = [f"/api/v1/products/{product_id}" for product_id in range(900001, 900006)] + ["/no/such/page"]
+    responses, metrics = asyncio.run(_scrape(paths))
+    assert all(r.headers["server-timing"].startswith("app;dur=") for r in responses)
+
+    text = metrics.text
+    assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{method="GET",route="/api/v1/products/{product_id}",status="404"} 5' in text
+    assert 'route="<unmatched>",status="404"' in text
+    assert "900001" not in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/products/{product_id}"} 5' in text
+
+
+def test_unknown_methods_share_one_label():
+    async def steps():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            for method in ("FOO1", "FOO2", "FOO3"):
+                await client.request(method, "/api/v1/products/")
+            metrics = await client.get("/metrics")
+        await async_engine.dispose()
+        return metrics.text
+
+    text = asyncio.run(steps())
+    assert "FOO" not in text
+    assert 'http_requests_total{method="OTHER",route="/api/v1/products/",status="405"} 3' in text
+    assert 'http_requests_in_progress{method="OTHER"} 0' in text
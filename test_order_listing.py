@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+GET /orders/ must cost a constant number of queries per page, however many
+orders and items it returns (no N+1 lazy loads of Order.items).
+Run with: python -m pytest -q test_order_listing.py
+"""
+
+import asyncio
+import uuid
+
+import httpx
+from sqlalchemy import event
+
+from app.main import app
+from app.db.session import SessionLocal, async_engine
+from app.models import Order, OrderItem
+
+ADMIN = {"x-role": "admin"}
+
+
+def _create_orders(count, city):
+    db = SessionLocal()
+    try:
+        for n in range(count):
+            order = Order(
+                customer_name=f"Customer {n}",
+                email=f"customer{n}@example.com",
+                phone="03000000000",
+                address_line1="1 Test Street",
+                city=city,
+                country="Pakistan",
+                total_amount=300.0,
+            )
+            # product_id 0 never exists, so these items can't skew stock tests sharing the DB
+            order.items = [
+                OrderItem(product_id=0, name="Ring", unit_price=100.0, quantity=1, line_total=100.0),
+                OrderItem(product_id=0, name="Studs", unit_price=100.0, quantity=2, line_total=200.0),
+            ]
+            db.add(order)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _get_pages(params):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    pages = []
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            while True:
+                statements.clear()
+                response = await client.get("/api/v1/orders/", params=params, headers=ADMIN)
+                assert response.status_code == 200
+                pages.append((response.json(), len(statements)))
+                if not response.json()["next_cursor"]:
+                    break
+                params = {**params, "cursor": response.json()["next_cursor"]}
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+        await async_engine.dispose()
+    return pages
+
+
+def test_order_page_costs_two_queries():
+    city = f"City-{uuid.uuid4().hex[:8]}"
+    _create_orders(250, city)
+
+    pages = asyncio.run(_get_pages({"city": city.upper(), "limit": 100}))
+
+    assert [len(page["items"]) for page, _ in pages] == [100, 100, 50]
+    # One query for the page of orders, one IN query for all of their items
+    assert all(queries == 2 for _, queries in pages)
+    orders = [order for page, _ in pages for order in page["items"]]
+    assert len({order["id"] for order in orders}) == 250
+    assert all(len(order["items"]) == 2 for order in orders)
+    assert [order["id"] for order in orders] == sorted((order["id"] for order in orders), reverse=True)
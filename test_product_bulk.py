@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Bulk product endpoints: CSV/NDJSON import (insert and upsert), PATCH
+/products/bulk and the streaming export.
+Run with: python -m pytest -q test_product_bulk.py
+"""
+
+import asyncio
+import csv
+import io
+import json
+import uuid
+
+import httpx
+from sqlalchemy import event
+
+from app.main import app
+from app.api.v1.endpoints.product_bulk import IN_CHUNK
+from app.db.session import SessionLocal, async_engine
+from app.models import Category, Product
+
+ADMIN = {"x-role": "admin"}
+
+
+def _category():
+    db = SessionLocal()
+    try:
+        category = Category(name=f"Bulk {uuid.uuid4().hex[:8]}")
+        db.add(category)
+        db.commit()
+        return category.id
+    finally:
+        db.close()
+
+
+def _products(unique_keys):
+    db = SessionLocal()
+    try:
+        rows = db.query(Product).filter(Product.unique_key.in_(unique_keys)).all()
+        return {row.unique_key: row for row in rows}
+    finally:
+        db.close()
+
+
+async def _requests(steps):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        try:
+            return await steps(client)
+        finally:
+            await async_engine.dispose()
+
+
+def _import(body, content_type, **params):
+    async def steps(client):
+        return await client.post(
+            "/api/v1/products/import",
+            content=body,
+            params=params,
+            headers={**ADMIN, "Content-Type": content_type},
+        )
+    return asyncio.run(_requests(steps))
+
+
+def test_csv_import_inserts_valid_rows_and_reports_the_rest():
+    category_id = _category()
+    keys = [uuid.uuid4().hex for _ in range(5)]
+    body = "\n".join([
+        "unique_key,name,retail_price,stock,category_id,description",
+        f'{keys[0]},Ring,1200,3,{category_id},"two\nlines"',
+        f"{keys[1]},Bangle,abc,1,{category_id},",
+        f"{keys[2]},Anklet,inf,1,{category_id},",
+        f"{keys[3]},Chain,500,1,999999999,",
+        f"{keys[0]},Ring again,1300,1,{category_id},",
+        f"{keys[4]},Stud,300,,{category_id},",
+    ])
+
+    response = _import(body, "text/csv")
+
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["inserted"], report["updated"], report["failed"]) == (2, 0, 4)
+    assert [error["row"] for error in report["errors"]] == [2, 3, 4, 5]
+    products = _products(keys)
+    assert sorted(products) == sorted([keys[0], keys[4]])
+    assert products[keys[0]].description == "two\nlines"
+    assert products[keys[4]].stock == 0
+
+
+def test_ndjson_upsert_updates_existing_rows():
+    category_id = _category()
+    key, new_key = uuid.uuid4().hex, uuid.uuid4().hex
+    first = json.dumps({"unique_key": key, "name": "Pendant", "retail_price": 800, "category_id": category_id})
+    assert _import(first, "application/x-ndjson").json()["inserted"] == 1
+
+    body = "\n".join([
+        json.dumps({"unique_key": key, "name": "Pendant", "retail_price": 900, "category_id": category_id}),
+        json.dumps({"unique_key": new_key, "name": "Locket", "retail_price": 400, "category_id": category_id}),
+        "not json",
+    ])
+    skipped = _import(body, "application/x-ndjson").json()
+    upserted = _import(body, "application/x-ndjson", mode="upsert").json()
+
+    assert (skipped["inserted"], skipped["updated"], skipped["failed"]) == (1, 0, 2)
+    assert (upserted["inserted"], upserted["updated"], upserted["failed"]) == (0, 2, 1)
+    assert _products([key])[key].retail_price == 900
+
+
+def test_large_batches_check_existing_keys_in_chunks():
+    category_id = _category()
+    body = "\n".join(
+        json.dumps({"unique_key": uuid.uuid4().hex, "name": f"Bulk {n}", "retail_price": 10, "category_id": category_id})
+        for n in range(IN_CHUNK * 2 + 1)
+    )
+    lookups = []
+
+    def record_lookup(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT products.unique_key"):
+            lookups.append(len(parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record_lookup)
+    try:
+        inserted = _import(body, "application/x-ndjson", batch_size=10000).json()
+        updated = _import(body, "application/x-ndjson", batch_size=10000, mode="upsert").json()
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record_lookup)
+        # Keep the shared test database small for suites that page through products
+        db = SessionLocal()
+        try:
+            db.query(Product).filter(Product.category_id == category_id).delete()
+            db.commit()
+        finally:
+            db.close()
+
+    assert (inserted["inserted"], updated["updated"]) == (IN_CHUNK * 2 + 1, IN_CHUNK * 2 + 1)
+    assert lookups == [IN_CHUNK, IN_CHUNK, 1] * 2
+
+
+def test_bulk_patch_groups_changes_and_lists_unknown_targets():
+    category_id = _category()
+    keys = [uuid.uuid4().hex for _ in range(3)]
+    _import("\n".join(
+        json.dumps({"unique_key": k, "name": "Patched", "retail_price": 1000, "offer_price": 1000, "stock": 2, "category_id": category_id})
+        for k in keys
+    ), "application/x-ndjson")
+    ids = {k: p.id for k, p in _products(keys).items()}
+    patches = [
+        {"id": ids[keys[0]], "field": "offer_price", "op": "percent", "value": -10},
+        {"id": ids[keys[1]], "field": "offer_price", "op": "percent", "value": -10},
+        {"unique_key": keys[2], "field": "stock", "op": "add", "value": -5},
+        {"id": ids[keys[2]], "field": "status", "value": "sold"},
+        {"unique_key": "missing-key", "field": "stock", "op": "set", "value": 1},
+    ]
+
+    async def steps(client):
+        return await client.patch("/api/v1/products/bulk", json={"patches": patches}, headers=ADMIN)
+
+    result = asyncio.run(_requests(steps)).json()
+
+    assert (result["patches"], result["statements"], result["rows_updated"]) == (5, 3, 4)
+    assert result["not_found"] == ["missing-key"]
+    products = _products(keys)
+    assert [products[k].offer_price for k in keys] == [900, 900, 1000]
+    assert (products[keys[2]].stock, products[keys[2]].status) == (0, "sold")
+
+
+def test_bulk_patch_rejects_non_finite_values():
+    bodies = [
+        '{"patches": [{"id": 1, "field": "retail_price", "value": %s}]}' % value
+        for value in ("Infinity", "-Infinity", "NaN")
+    ]
+
+    async def steps(client):
+        return [
+            await client.patch("/api/v1/products/bulk", content=body, headers={**ADMIN, "Content-Type": "application/json"})
+            for body in bodies
+        ]
+
+    responses = asyncio.run(_requests(steps))
+    assert [response.status_code for response in responses] == [422, 422, 422]
+    assert [response.json()["detail"][0]["type"] for response in responses] == ["finite_number"] * 3
+
+
+def test_export_streams_every_product_in_both_formats():
+    category_id = _category()
+    key = uuid.uuid4().hex
+    _import(json.dumps({"unique_key": key, "name": "Exported", "retail_price": 250, "category_id": category_id}), "application/x-ndjson")
+
+    async def steps(client):
+        ndjson = await client.get("/api/v1/products/export", headers=ADMIN)
+        table = await client.get("/api/v1/products/export", params={"format": "csv"}, headers=ADMIN)
+        return ndjson, table
+
+    ndjson, table = asyncio.run(_requests(steps))
+
+    rows = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+    assert any(row["unique_key"] == key and row["retail_price"] == 250 for row in rows)
+    records = list(csv.DictReader(io.StringIO(table.text)))
+    assert [int(record["id"]) for record in records] == [row["id"] for row in rows]
+    assert any(record["unique_key"] == key and record["name"] == "Exported" for record in records)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+product_images mirrors products.images whatever shape the JSON takes: a list,
+a bare URL or a single {"url": ...} object each give one row per image.
+Run with: python -m pytest -q test_product_images.py
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import uuid
+
+import httpx
+from sqlalchemy import create_engine, text
+
+from app.main import app
+from app.db.base import Base
+from app.db.migrations import upgrade
+from app.db.session import SessionLocal, async_engine
+from app.models import Category
+
+ADMIN = {"x-role": "admin"}
+
+
+def _category_id():
+    db = SessionLocal()
+    try:
+        category = Category(name=f"Images {uuid.uuid4().hex[:8]}")
+        db.add(category)
+        db.commit()
+        return category.id
+    finally:
+        db.close()
+
+
+async def _create_and_read(images):
+    product = {"name": "Imaged", "retail_price": 100.0, "category_id": _category_id(), "images": images}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        created = await client.post("/api/v1/products/", json=product, headers=ADMIN)
+        details = await client.get(f"/api/v1/products/details/{created.json()['id']}")
+    await async_engine.dispose()
+    return created.status_code, details.json()["product"]["images"]
+
+
+def test_image_shapes():
+    single = json.dumps({"url": "front.jpg", "alt": "Front"})
+    listed = json.dumps(["front.jpg", {"url": "back.jpg"}])
+    assert asyncio.run(_create_and_read(single)) == (200, ["front.jpg"])
+    assert asyncio.run(_create_and_read(listed)) == (200, ["front.jpg", "back.jpg"])
+    assert asyncio.run(_create_and_read("front.jpg")) == (200, ["front.jpg"])
+
+
+def test_upgrade_replaces_changed_triggers():
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='jem-triggers-'), 'app.db')}")
+    Base.metadata.create_all(engine)
+    upgrade(engine)
+    with engine.begin() as conn:
+        # An older definition of the trigger, as a deployed database may still have
+        conn.execute(text("DROP TRIGGER products_images_ai"))
+        conn.execute(text("CREATE TRIGGER products_images_ai AFTER INSERT ON products BEGIN SELECT 1; END"))
+
+    upgrade(engine)
+
+    with engine.connect() as conn:
+        sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'products_images_ai'")).scalar()
+    assert "json_each" in sql
+    engine.dispose()
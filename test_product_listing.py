@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+GET /products/ filters and the catalog cache agree: spellings of the same
+category filter share a cache entry and return the same products.
+Run with: python -m pytest -q test_product_listing.py
+"""
+
+import asyncio
+import uuid
+
+import httpx
+
+from app.main import app
+from app.db.session import SessionLocal, async_engine
+from app.models import Category, Product
+
+
+def _category_with_products(count):
+    db = SessionLocal()
+    try:
+        category = Category(name=f"Listing {uuid.uuid4().hex[:8]}")
+        db.add(category)
+        db.flush()
+        db.add_all(Product(name=f"Listed {n}", retail_price=100.0, stock=1, category_id=category.id) for n in range(count))
+        db.commit()
+        return category.name
+    finally:
+        db.close()
+
+
+async def _counts(names):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        responses = [await client.get("/api/v1/products/", params={"category_name": name}) for name in names]
+    await async_engine.dispose()
+    return [len(response.json()) for response in responses]
+
+
+def test_category_name_is_normalized_for_filter_and_cache():
+    name = _category_with_products(3)
+    assert asyncio.run(_counts([f" {name.upper()} ", name, name.lower()])) == [3, 3, 3]
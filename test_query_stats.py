@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Queries are attributed to the request that ran them: the debug headers carry
+the count and DB time, and a statement repeated in one request is logged as a
+probable N+1.
+Run with: python -m pytest -q test_query_stats.py
+"""
+
+import asyncio
+import logging
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import select
+
+from app.db.session import AsyncSessionLocal, async_engine
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.models import Product
+
+
+def _app():
+    app = FastAPI()
+
+    @app.get("/one-query")
+    async def one_query():
+        async with AsyncSessionLocal() as db:
+            await db.execute(select(Product.id).limit(1))
+        return {}
+
+    @app.get("/n-plus-one")
+    async def n_plus_one():
+        async with AsyncSessionLocal() as db:
+            for product_id in range(1, 7):
+                await db.execute(select(Product.name).where(Product.id == product_id))
+        return {}
+
+    app.add_middleware(QueryStatsMiddleware, debug_headers=True, n_plus_one_threshold=5)
+    return app
+
+
+async def _get(*paths):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=_app()), base_url="http://test") as client:
+        responses = [await client.get(path) for path in paths]
+    await async_engine.dispose()
+    return responses
+
+
+def test_queries_are_counted_per_request_and_n_plus_one_is_flagged(caplog):
+    with caplog.at_level(logging.WARNING, logger="app.middleware.query_stats"):
+        single, repeated = asyncio.run(_get("/one-query", "/n-plus-one"))
+
+    assert single.headers["x-db-query-count"] == "1"
+    assert float(single.headers["x-db-time-ms"]) >= 0
+    assert single.headers["server-timing"].startswith("db;dur=")
+    assert "x-db-repeated-statements" not in single.headers
+
+    assert repeated.headers["x-db-query-count"] == "6"
+    assert repeated.headers["x-db-repeated-statements"] == "1"
+    messages = [record.getMessage() for record in caplog.records]
+    assert len(messages) == 1
+    assert "Probable N+1 in GET /n-plus-one: statement ran 6 times" in messages[0]
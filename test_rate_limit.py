@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+RateLimitMiddleware: each route class has its own bucket per client, an empty
+bucket answers 429 with Retry-After, and the SQLite store shares buckets
+between limiter instances (i.e. between workers) without ever blocking
+a request on a locked file.
+Run with: python -m pytest -q test_rate_limit.py
+"""
+
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.middleware.rate_limit import MemoryBucketStore, RateLimitMiddleware, SQLiteBucketStore, parse_policy
+
+POLICIES = {"auth": parse_policy("auth", "3/60"), "catalog": parse_policy("catalog", "5/60")}
+
+
+def _app(store, **options):
+    app = FastAPI()
+
+    @app.get("/api/v1/products/")
+    async def products():
+        return []
+
+    @app.post("/api/v1/auth/login")
+    async def login():
+        return {}
+
+    @app.get("/health")
+    async def health():
+        return {}
+
+    app.add_middleware(RateLimitMiddleware, policies=POLICIES, store=store, **options)
+    return app
+
+
+async def _statuses(app, method, path, count, client=("10.0.0.1", 1234)):
+    transport = httpx.ASGITransport(app=app, client=client)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        responses = [await http.request(method, path) for _ in range(count)]
+    return [r.status_code for r in responses], responses[-1]
+
+
+def test_buckets_per_route_class_and_client():
+    app = _app(MemoryBucketStore())
+    statuses, last = asyncio.run(_statuses(app, "POST", "/api/v1/auth/login", 5))
+    assert statuses == [200, 200, 200, 429, 429]
+    assert int(last.headers["retry-after"]) == 20
+
+    # Catalog has its own bucket, other clients their own, unclassified routes none
+    assert asyncio.run(_statuses(app, "GET", "/api/v1/products/", 5))[0] == [200] * 5
+    assert asyncio.run(_statuses(app, "POST", "/api/v1/auth/login", 3, client=("10.0.0.2", 1)))[0] == [200] * 3
+    assert asyncio.run(_statuses(app, "GET", "/health", 20))[0] == [200] * 20
+
+
+async def _forwarded(app, forwarded_for):
+    transport = httpx.ASGITransport(app=app, client=("10.0.0.9", 1))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        responses = [await http.post("/api/v1/auth/login", headers={"x-forwarded-for": value}) for value in forwarded_for]
+    return [r.status_code for r in responses]
+
+
+def test_forwarded_for_is_read_from_the_trusted_proxy():
+    app = _app(MemoryBucketStore(), trusted_proxies=1)
+    # A fresh spoofed first hop per request must not buy a fresh bucket
+    spoofed = [f"1.2.3.{n}, 203.0.113.7" for n in range(4)]
+    assert asyncio.run(_forwarded(app, spoofed)) == [200, 200, 200, 429]
+    assert asyncio.run(_forwarded(app, ["203.0.113.8"])) == [200]
+
+
+def test_sqlite_store_is_shared_between_workers():
+    path = os.path.join(tempfile.mkdtemp(prefix="jem-rate-"), "limits.db")
+    first, second = _app(SQLiteBucketStore(path)), _app(SQLiteBucketStore(path))
+    assert asyncio.run(_statuses(first, "POST", "/api/v1/auth/login", 2))[0] == [200, 200]
+    statuses, last = asyncio.run(_statuses(second, "POST", "/api/v1/auth/login", 2))
+    assert statuses == [200, 429]
+    assert 1 <= int(last.headers["retry-after"]) <= 20
+
+
+def test_sqlite_store_fails_open_when_locked():
+    path = os.path.join(tempfile.mkdtemp(prefix="jem-rate-"), "limits.db")
+    app = _app(SQLiteBucketStore(path))
+    # Another worker holding the write lock must not stall (or reject) this one
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute("BEGIN EXCLUSIVE")
+    started = time.monotonic()
+    statuses, _ = asyncio.run(_statuses(app, "POST", "/api/v1/auth/login", 5))
+    holder.rollback()
+    assert statuses == [200] * 5
+    assert time.monotonic() - started < 1
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Sales rollups: orders already in a database when the rollups appear are
+backfilled by upgrade(), once.
+Run with: python -m pytest -q test_sales_rollups.py
+"""
+
+import os
+import tempfile
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine, insert, select
+
+from app.db.base import Base
+from app.db.migrations import upgrade
+from app.models import Order, OrderItem, SalesDaily
+
+
+def test_upgrade_backfills_existing_orders():
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='jem-rollups-'), 'app.db')}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Order), [{
+            "id": 1, "customer_name": "Before Rollups", "email": "old@example.com", "phone": "0300", "address_line1": "1 Street",
+            "city": "Lahore", "country": "Pakistan", "total_amount": 300.0, "created_at": datetime(2026, 1, 5, tzinfo=timezone.utc),
+        }])
+        conn.execute(insert(OrderItem), [{"order_id": 1, "product_id": 1, "name": "x", "unit_price": 100.0, "quantity": 3, "line_total": 300.0}])
+
+    upgrade(engine)
+    upgrade(engine)  # idempotent: the rollups are no longer empty, so nothing is added twice
+
+    with engine.connect() as conn:
+        assert conn.execute(select(SalesDaily.revenue, SalesDaily.units, SalesDaily.orders)).all() == [(300.0, 3, 1)]
+    engine.dispose()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for stock reservation in POST /orders/.
+
+Fires hundreds of simultaneous checkouts at products with limited stock and
+checks that exactly the available units are sold, never more.
+Run with: python -m pytest -q test_stock_reservation.py
+"""
+
+import asyncio
+import uuid
+
+import httpx
+from sqlalchemy import text
+
+from app.main import app
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine, begin_immediate
+from app.models import Category, Product, OrderItem
+
+CHECKOUTS = 300
+
+ORDER = {
+    "customer_name": "Stress Test",
+    "email": "stress@example.com",
+    "phone": "03000000000",
+    "address_line1": "1 Test Street",
+    "city": "Lahore",
+    "country": "Pakistan",
+}
+
+
+def _create_products(*stocks):
+    db = SessionLocal()
+    try:
+        category = Category(name=f"Stress {uuid.uuid4().hex[:8]}")
+        db.add(category)
+        db.flush()
+        products = [
+            Product(name=f"Stress item {stock}", retail_price=100.0, stock=stock, category_id=category.id)
+            for stock in stocks
+        ]
+        db.add_all(products)
+        db.commit()
+        return [product.id for product in products]
+    finally:
+        db.close()
+
+
+def _load(product_id):
+    db = SessionLocal()
+    try:
+        product = db.get(Product, product_id)
+        ordered = sum(item.quantity for item in db.query(OrderItem).filter(OrderItem.product_id == product_id))
+        return product, ordered
+    finally:
+        db.close()
+
+
+async def _checkout_all(payloads):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60) as client:
+        responses = await asyncio.gather(*(client.post("/api/v1/orders/", json=payload) for payload in payloads))
+    # Pooled connections belong to this event loop; the next asyncio.run() needs fresh ones
+    await async_engine.dispose()
+    return [response.status_code for response in responses]
+
+
+def test_parallel_checkouts_never_oversell():
+    (product_id,) = _create_products(50)
+    payload = {**ORDER, "items": [{"product_id": product_id, "name": "x", "quantity": 1}]}
+
+    statuses = asyncio.run(_checkout_all([payload] * CHECKOUTS))
+
+    assert statuses.count(200) == 50
+    assert statuses.count(409) == CHECKOUTS - 50
+    product, ordered = _load(product_id)
+    assert product.stock == 0
+    assert product.sold == 50
+    assert product.status == "out_of_stock"
+    assert ordered == 50
+
+
+def test_failed_checkout_reserves_nothing():
+    scarce_id, plentiful_id = _create_products(30, 1000)
+    payload = {
+        **ORDER,
+        "items": [
+            {"product_id": plentiful_id, "name": "x", "quantity": 2},
+            {"product_id": scarce_id, "name": "x", "quantity": 1},
+        ],
+    }
+
+    statuses = asyncio.run(_checkout_all([payload] * CHECKOUTS))
+
+    assert statuses.count(200) == 30
+    scarce, scarce_ordered = _load(scarce_id)
+    plentiful, plentiful_ordered = _load(plentiful_id)
+    assert scarce.stock == 0 and scarce_ordered == 30
+    # Rejected orders must not have kept the units they took from the other product
+    assert plentiful.stock == 1000 - 60 and plentiful_ordered == 60
+
+
+async def _stock_around_checkout(product_id, payload):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        before = await client.get("/api/v1/products/", params={"limit": 500})
+        await client.post("/api/v1/orders/", json=payload)
+        after = await client.get("/api/v1/products/", params={"limit": 500})
+    await async_engine.dispose()
+    stock = lambda response: next(p["stock"] for p in response.json() if p["id"] == product_id)
+    return stock(before), stock(after)
+
+
+def test_checkout_refreshes_cached_listings():
+    (product_id,) = _create_products(5)
+    payload = {**ORDER, "items": [{"product_id": product_id, "name": "x", "quantity": 2}]}
+
+    assert asyncio.run(_stock_around_checkout(product_id, payload)) == (5, 3)
+
+
+async def _busy_timeout_around_begin(busy_timeout):
+    async with AsyncSessionLocal() as db:
+        await db.execute(text(f"PRAGMA busy_timeout={busy_timeout}"))
+        await begin_immediate(db)
+        after = await db.scalar(text("PRAGMA busy_timeout"))
+        await db.rollback()
+    await async_engine.dispose()
+    return after
+
+
+def test_begin_immediate_restores_the_busy_timeout():
+    # Including a connection without one (SQLITE_BUSY_TIMEOUT_MS="")
+    assert asyncio.run(_busy_timeout_around_begin(1234)) == 1234
+    assert asyncio.run(_busy_timeout_around_begin(0)) == 0
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+get_current_user caches verified tokens: repeat requests skip the signature
+check and the users lookup, and a password reset or deactivation revokes
+tokens immediately.
+Run with: python -m pytest -q test_token_cache.py
+"""
+
+import asyncio
+import uuid
+
+import httpx
+from sqlalchemy import event
+
+from app.main import app
+from app.core.cache import token_cache
+from app.db.session import async_engine
+
+ADMIN = {"x-role": "admin"}
+
+
+async def _session(steps):
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        if "FROM users" in statement:
+            statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await steps(client, statements)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+        await async_engine.dispose()
+
+
+async def _sign_up(client, password="first-password"):
+    email = f"{uuid.uuid4().hex[:12]}@example.com"
+    user = (await client.post("/api/v1/auth/signup", json={"email": email, "password": password})).json()
+    token = (await client.post("/api/v1/auth/login", json={"email": email, "password": password})).json()["access_token"]
+    return email, user["id"], {"Authorization": f"Bearer {token}"}
+
+
+def test_repeat_requests_skip_the_user_lookup():
+    async def steps(client, statements):
+        _, user_id, auth = await _sign_up(client)
+        statements.clear()
+        for _ in range(5):
+            response = await client.get("/api/v1/auth/me", headers=auth)
+            assert response.status_code == 200
+            assert response.json()["id"] == user_id
+        # One token verification, then only /me's own load of the row
+        verifications = [s for s in statements if "token_version" in s and "hashed_password" not in s]
+        assert len(verifications) == 1
+
+    asyncio.run(_session(steps))
+
+
+def test_password_reset_and_deactivation_revoke_tokens():
+    async def steps(client, statements):
+        email, user_id, auth = await _sign_up(client)
+        assert (await client.get("/api/v1/auth/me", headers=auth)).status_code == 200
+
+        reset = (await client.post("/api/v1/auth/forgot-password", json={"email": email})).json()
+        await client.post("/api/v1/auth/reset-password", json={"token": reset["reset_token"], "new_password": "second-password"})
+        assert (await client.get("/api/v1/auth/me", headers=auth)).status_code == 401
+
+        login = await client.post("/api/v1/auth/login", json={"email": email, "password": "second-password"})
+        auth = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        assert (await client.get("/api/v1/auth/me", headers=auth)).status_code == 200
+
+        assert (await client.post(f"/api/v1/auth/users/{user_id}/deactivate", headers=ADMIN)).status_code == 200
+        assert (await client.get("/api/v1/auth/me", headers=auth)).status_code == 401
+        assert not token_cache.pop_where(lambda user: user.id == user_id)
+
+    asyncio.run(_session(steps))